@@ -0,0 +1,144 @@
+#%%
+# counting engine for the number of paths in input-output graphs
+# same quantities as number_of_paths_in_graph.py, but scales to tables with 10'000+ sectors
+
+# IMPORTS #######################################
+
+# data science
+import numpy as np
+import pandas as pd
+from scipy.special import gammaln
+
+# type hints
+from typing import Tuple
+
+# FUNCTIONS #####################################
+
+def count_paths_two_nodes_graph_theory(
+    n_max: int,
+    l_max: int,
+    log: bool = False,
+) -> np.ndarray:
+    '''
+    Returns an array (n, l) with the number of paths of length l = 1..l_max between two nodes
+    of an input-output-table with n = 1..n_max sectors.
+    Compare: https://math.stackexchange.com/a/4704603/
+
+    With m = n-2, the sum over (n-2)!/k! for k=[n-l-1, n-2] is the prefix sum
+    of the falling factorials m, m(m-1), m(m-1)(m-2), ...
+    Each column l therefore only adds one running product to the previous column.
+    If log is True, log10 of the number of paths is returned as float (-inf for no paths).
+    '''
+    n = np.arange(1, n_max + 1)
+    m = n - 2
+    l = np.arange(1, l_max + 1)
+    has_paths = l[None, :] <= (n[:, None] - 1)
+
+    if log:
+        # log of falling factorials m^(j), j=0..l_max-1; zero once a factor m-i <= 0 appears
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factors = np.log((m[:, None] - np.arange(0, l_max - 1)[None, :]).astype(float))
+        factors = np.where(np.isnan(factors), -np.inf, factors)
+        log_falling = np.hstack([np.zeros((n_max, 1)), np.cumsum(factors, axis=1)])
+        log_result = np.logaddexp.accumulate(log_falling, axis=1) / np.log(10)
+        return np.where(has_paths, log_result, -np.inf)
+
+    result = np.zeros((n_max, l_max), dtype=object)
+    running = np.ones(n_max, dtype=object)
+    prefix = np.zeros(n_max, dtype=object)
+    factors = m.astype(object)
+    for j in range(l_max):
+        prefix = prefix + running
+        result[:, j] = prefix
+        running = running * np.maximum(factors - j, 0)
+    result[~has_paths] = 0
+    return result
+
+
+def count_paths_all_nodes_graph_theory(
+    n_max: int,
+    log: bool = False,
+) -> np.ndarray:
+    '''
+    Returns an array (n) with the number of paths between all nodes
+    of an input-output-table with n = 1..n_max sectors.
+    Compare: https://math.stackexchange.com/a/4704603/
+
+    The sum over n!/k! for k=[0, n-2] equals T(n) - n - 1, where T(n) = sum over n!/k! for k=[0, n]
+    follows the recursion T(n) = n * T(n-1) + 1, T(0) = 1.
+    If log is True, log10 of the number of paths is returned as float (-inf for no paths),
+    using T(n) = n! * sum over 1/k! for k=[0, n].
+    '''
+    n = np.arange(1, n_max + 1)
+    has_paths = n > 2
+
+    if log:
+        log_inverse_factorial = -gammaln(np.arange(0, n_max + 1) + 1)
+        log_partial_e = np.logaddexp.accumulate(log_inverse_factorial)[1:]
+        log_t = gammaln(n + 1) + log_partial_e
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_result = (log_t + np.log1p(-(n + 1) / np.exp(np.minimum(log_t, 700)))) / np.log(10)
+        return np.where(has_paths, log_result, -np.inf)
+
+    result = np.zeros(n_max, dtype=object)
+    t = 1
+    for i in range(n_max):
+        t = (i + 1) * t + 1
+        result[i] = t - (i + 1) - 1 if has_paths[i] else 0
+    return result
+
+
+def count_paths_power_series(
+    n_max: int,
+    omega_max: int,
+    offset: int,
+    log: bool = False,
+) -> np.ndarray:
+    '''
+    Returns an array (n, omega) with n**(omega + offset) for omega = 1..omega_max,
+    i.e. the number of omega-order paths between two nodes (offset=-1)
+    or all nodes (offset=+1) of an input-output-table with n sectors.
+    Compare: https://doi.org/10.1017/9781108676212, Section 8.5.1
+    '''
+    n = np.arange(1, n_max + 1)
+    exponent = np.arange(1, omega_max + 1) + offset
+    if log:
+        return np.log10(n)[:, None] * exponent[None, :]
+    return np.power(n.astype(object)[:, None], exponent[None, :])
+
+
+def create_dataframe_number_of_paths(
+        n_max: int = 50,
+        param_max: int = 10,
+        log: bool = False,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    '''
+    Drop-in replacement of `create_dataframe_number_of_paths` in number_of_paths_in_graph.py.
+    Creates a dataframe with the number of paths
+    for all combinations of n and omega or l.
+    '''
+    index = pd.RangeIndex(1, n_max + 1)
+    columns = pd.RangeIndex(1, param_max)
+
+    df_two_nodes_power_series = pd.DataFrame(
+        count_paths_power_series(n_max, param_max - 1, offset = -1, log = log),
+        index = index,
+        columns = columns,
+    )
+    df_two_nodes_graph_theory = pd.DataFrame(
+        count_paths_two_nodes_graph_theory(n_max, param_max - 1, log = log),
+        index = index,
+        columns = columns,
+    )
+    df_all_nodes_power_series = pd.DataFrame(
+        count_paths_power_series(n_max, param_max - 1, offset = +1, log = log),
+        index = index,
+        columns = columns,
+    )
+    all_nodes_graph_theory = count_paths_all_nodes_graph_theory(n_max, log = log)
+    df_all_nodes_graph_theory = pd.DataFrame(
+        np.repeat(all_nodes_graph_theory[:, None], param_max - 1, axis=1),
+        index = index,
+        columns = columns,
+    )
+    return df_two_nodes_power_series, df_two_nodes_graph_theory, df_all_nodes_power_series, df_all_nodes_graph_theory
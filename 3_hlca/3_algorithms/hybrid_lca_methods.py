@@ -0,0 +1,183 @@
+#%%
+# tiered, matrix augmentation, integrated and path exchange hybrid LCA on one shared system
+# the factorizations of (I-A_p) and (I-A_io) are computed once and reused by all methods
+# compare: 1_research_plan/2_nomenclature and 3_hlca/1_system_illustrations
+
+# IMPORTS #######################################
+
+# sys
+import time
+# data science
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+import scipy.sparse.linalg as sparse_linalg
+# hlca
+from path_exchange import exchange_paths
+
+# FUNCTIONS #####################################
+
+def factorize_system(
+    A_p: np.ndarray | sparse.spmatrix,
+    A_io: np.ndarray | sparse.spmatrix,
+) -> dict:
+    """
+    Computes the sparse LU factorizations of (I-A_p) and (I-A_io) once.
+    Each factorization solves both x = (I-A)^-1 y and, transposed, the total intensities m = f (I-A)^-1.
+    """
+    A_p = sparse.csc_matrix(A_p)
+    A_io = sparse.csc_matrix(A_io)
+    I_minus_A_p = sparse.identity(A_p.shape[0], format='csc') - A_p
+    return {
+        'I_minus_A_p': I_minus_A_p,
+        'process': sparse_linalg.splu(I_minus_A_p),
+        'io': sparse_linalg.splu(sparse.identity(A_io.shape[0], format='csc') - A_io),
+    }
+
+
+def calculate_tiered(
+    factorizations: dict,
+    C_u: sparse.spmatrix,
+    f_p: np.ndarray,
+    f_io: np.ndarray,
+    y_p: np.ndarray,
+) -> float:
+    """
+    Tiered hybrid: process LCA, with the upstream cut-offs C_u x_p priced by the IO total intensities.
+    No feedback from the IO system into the process system.
+    """
+    x_p = factorizations['process'].solve(y_p)
+    m_io = factorizations['io'].solve(f_io, trans='T')
+    return f_p @ x_p + m_io @ (C_u @ x_p)
+
+
+def calculate_coupled(
+    factorizations: dict,
+    C_u: sparse.spmatrix,
+    C_d: sparse.spmatrix,
+    f_p: np.ndarray,
+    f_io: np.ndarray,
+    y_p: np.ndarray,
+) -> float:
+    """
+    Solves the coupled system
+
+        [[I-A_p, -C_d], [-C_u, I-A_io]] [x_p, x_io] = [y_p, 0]
+
+    by eliminating x_io = (I-A_io)^-1 C_u x_p. The Schur complement (I-A_p) - C_d (I-A_io)^-1 C_u
+    is never formed: it is applied as a linear operator inside GMRES, preconditioned by the process factorization.
+    """
+    lu_p = factorizations['process']
+    lu_io = factorizations['io']
+    n_p = y_p.shape[0]
+    schur = sparse_linalg.LinearOperator(
+        shape = (n_p, n_p),
+        matvec = lambda v: factorizations['I_minus_A_p'] @ v - C_d @ lu_io.solve(C_u @ v),
+    )
+    preconditioner = sparse_linalg.LinearOperator(
+        shape = (n_p, n_p),
+        matvec = lu_p.solve,
+    )
+    x_p, info = sparse_linalg.gmres(schur, y_p, M = preconditioner, rtol = 1e-12)
+    if info != 0:
+        raise ValueError(f"Coupled hybrid system did not converge (GMRES info={info})")
+    x_io = lu_io.solve(C_u @ x_p)
+    return f_p @ x_p + f_io @ x_io
+
+
+def calculate_path_exchange(
+    factorizations: dict,
+    A_p: sparse.spmatrix,
+    A_io: sparse.spmatrix,
+    C_u: sparse.spmatrix,
+    G: sparse.spmatrix,
+    f_p: np.ndarray,
+    f_io: np.ndarray,
+    y_p: np.ndarray,
+    sector: int,
+    price: float,
+) -> float:
+    """
+    Path exchange hybrid: starts from the IO result of the product (demand `price` on IO `sector`)
+    and exchanges the paths of order 0 and 1 against process data:
+    order 0 (direct emissions f_io[sector] * price) becomes f_p y_p,
+    order 1 (inputs A_io[:, sector] * price) become the process-based purchases G A_p y_p + C_u y_p,
+    where G (IO sector x process) converts process outputs into IO sector values.
+    Uses `exchange_paths` of path_exchange.py on the n first-order paths.
+    """
+    m_io = factorizations['io'].solve(f_io, trans='T')
+    n_io = A_io.shape[0]
+    inputs_io = np.asarray(sparse.csc_matrix(A_io)[:, sector].todense()).ravel() * price
+    inputs_process = G @ (A_p @ y_p) + C_u @ y_p
+
+    coefficients_io = np.column_stack([np.ones(n_io), inputs_io / price])
+    coefficients_process = np.column_stack([np.full(n_io, np.nan), inputs_process / price])
+    result = exchange_paths(
+        coefficients_io = coefficients_io,
+        coefficients_process = coefficients_process,
+        lengths = np.full(n_io, 2),
+        y_reference = price,
+        intensities = m_io,
+        total_io = m_io[sector] * price,
+    )
+    return result['total'] - f_io[sector] * price + f_p @ y_p
+
+
+def compare_hybrid_methods(
+    A_p: np.ndarray | sparse.spmatrix,
+    A_io: np.ndarray | sparse.spmatrix,
+    C_u: np.ndarray | sparse.spmatrix,
+    C_d: np.ndarray | sparse.spmatrix,
+    G: np.ndarray | sparse.spmatrix,
+    f_p: np.ndarray,
+    f_io: np.ndarray,
+    y_p: np.ndarray,
+    sector: int,
+    price: float,
+    H: np.ndarray | None = None,
+) -> pd.DataFrame:
+    """
+    Runs all four hybrid LCA methods on the same process system (A_p, f_p) and IO table (A_io, f_io):
+
+    - tiered: one-way, upstream cut-offs C_u (IO sector x process) only
+    - matrix augmentation: coupled system with upstream (C_u) and downstream (C_d, process x IO sector) links
+    - integrated: as matrix augmentation, with the double counting correction C_u * (1-H),
+      where the filter H is 1 for cut-offs already covered by the process system (no correction if None)
+    - path exchange: see `calculate_path_exchange`
+
+    Both factorizations are computed once and shared.
+    Returns a DataFrame indexed by method with the result and the wall time [s]
+    (the 'factorization' row holds the time of the shared factorizations).
+    """
+    C_u = sparse.csr_matrix(C_u)
+    C_d = sparse.csr_matrix(C_d)
+    G = sparse.csr_matrix(G)
+    A_p = sparse.csr_matrix(A_p)
+    A_io = sparse.csr_matrix(A_io)
+    f_p = np.asarray(f_p, dtype=float)
+    f_io = np.asarray(f_io, dtype=float)
+    y_p = np.asarray(y_p, dtype=float)
+    C_u_corrected = C_u if H is None else sparse.csr_matrix(C_u.multiply(1 - np.asarray(H)))
+
+    list_rows = []
+    start = time.perf_counter()
+    factorizations = factorize_system(A_p, A_io)
+    list_rows.append(('factorization', np.nan, time.perf_counter() - start))
+
+    methods = {
+        'tiered': lambda: calculate_tiered(factorizations, C_u, f_p, f_io, y_p),
+        'matrix augmentation': lambda: calculate_coupled(factorizations, C_u, C_d, f_p, f_io, y_p),
+        'integrated': lambda: calculate_coupled(factorizations, C_u_corrected, C_d, f_p, f_io, y_p),
+        'path exchange': lambda: calculate_path_exchange(
+            factorizations, A_p, A_io, C_u, G, f_p, f_io, y_p, sector, price
+        ),
+    }
+    for method, calculate in methods.items():
+        start = time.perf_counter()
+        result = calculate()
+        list_rows.append((method, result, time.perf_counter() - start))
+
+    return pd.DataFrame(
+        data = list_rows,
+        columns = ['method', 'result', 'time [s]'],
+    ).set_index('method')
@@ -0,0 +1,60 @@
+#%%
+# decomposition of input-output results into upstream production layers
+# by the power series (I-A)^-1 y = y + Ay + A^2y + ..., one sparse matrix-vector product per layer
+# compare: https://doi.org/10.1162/108819802766269575
+# and 1_research_plan/4_convergence_toward_upstream_production_layers
+
+# IMPORTS #######################################
+
+# data science
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+# hlca
+from structural_path_analysis import calculate_total_intensities
+
+# FUNCTIONS #####################################
+
+def decompose_production_layers(
+    A: np.ndarray | sparse.spmatrix,
+    y: np.ndarray,
+    f: np.ndarray | None = None,
+    tolerance: float = 1e-3,
+    max_order: int = 100,
+) -> pd.DataFrame:
+    """
+    Returns the contribution f A^k y of each production layer k,
+    where A is the technology matrix, y the final demand and f the direct intensities (default: ones, i.e. output).
+
+    Layers are computed as x_k+1 = A x_k, so each layer costs one sparse matrix-vector product
+    and neither (I-A)^-1 nor any power of A is ever formed.
+    The total f (I-A)^-1 y is obtained from one iterative solve for the total intensities;
+    iteration stops once the remaining upstream share 1 - cumulative/total is below `tolerance`.
+
+    Returns a DataFrame with columns 'order_of_production' (1 = final demand, as in data/wind_turbine.csv),
+    'layer', 'cumulative' and 'cumulative share [%]'.
+    """
+    A = sparse.csr_matrix(A)
+    y = np.asarray(y, dtype=float)
+    f = np.ones(A.shape[0]) if f is None else np.asarray(f, dtype=float)
+
+    total = calculate_total_intensities(A, f) @ y
+
+    list_layers = []
+    cumulative = 0.0
+    x = y
+    for k in range(max_order):
+        layer = f @ x
+        cumulative += layer
+        list_layers.append(layer)
+        if abs(1 - cumulative / total) < tolerance:
+            break
+        x = A @ x
+
+    df_layers = pd.DataFrame({
+        'order_of_production': np.arange(1, len(list_layers) + 1),
+        'layer': list_layers,
+    })
+    df_layers['cumulative'] = df_layers['layer'].cumsum()
+    df_layers['cumulative share [%]'] = df_layers['cumulative'] / total * 100
+    return df_layers
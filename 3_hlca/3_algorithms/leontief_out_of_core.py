@@ -0,0 +1,202 @@
+#%%
+# out-of-core solver for (I-A) x = y on large (multi-regional) input-output tables
+# the technology matrix stays on disk as memory-mapped CSR arrays;
+# the preconditioner is computed once, saved next to the matrix and reused between runs
+
+# IMPORTS #######################################
+
+# sys
+import os
+import json
+# data science
+import numpy as np
+import scipy.sparse as sparse
+import scipy.sparse.linalg as sparse_linalg
+
+# DATA ##########################################
+
+# files written by `build_preconditioner`, per kind
+dict_preconditioner_files: dict[str, list[str]] = {
+    'ilu': ['ilu_L.npz', 'ilu_U.npz', 'ilu_perm_r.npy', 'ilu_perm_c.npy'],
+    'jacobi': ['jacobi.npy'],
+}
+
+# FUNCTIONS #####################################
+
+def save_technology_matrix(
+    A: np.ndarray | sparse.spmatrix,
+    directory: str,
+) -> None:
+    """
+    Writes A as CSR arrays (A_data.npy, A_indices.npy, A_indptr.npy, A_shape.npy) to `directory`.
+    A preconditioner saved for a previous matrix in `directory` is deleted.
+    """
+    A = sparse.csr_matrix(A)
+    os.makedirs(directory, exist_ok=True)
+    remove_preconditioner(directory)
+    np.save(os.path.join(directory, 'A_data.npy'), A.data)
+    np.save(os.path.join(directory, 'A_indices.npy'), A.indices)
+    np.save(os.path.join(directory, 'A_indptr.npy'), A.indptr)
+    np.save(os.path.join(directory, 'A_shape.npy'), np.array(A.shape))
+
+
+def load_technology_matrix(
+    directory: str,
+) -> sparse.csr_matrix:
+    """
+    Returns A as CSR matrix backed by read-only memory maps of the files in `directory`.
+    Matrix-vector products page the matrix in from disk as needed, instead of loading it into RAM.
+    """
+    arrays = {
+        key: np.load(os.path.join(directory, f'A_{key}.npy'), mmap_mode='r')
+        for key in ['data', 'indices', 'indptr']
+    }
+    shape = tuple(np.load(os.path.join(directory, 'A_shape.npy')))
+    return sparse.csr_matrix(
+        (arrays['data'], arrays['indices'], arrays['indptr']),
+        shape = shape,
+        copy = False,
+    )
+
+
+def describe_technology_matrix(
+    directory: str,
+) -> dict:
+    """
+    Shape, number of non-zeros and modification time [ns] of the matrix saved in `directory`,
+    to match a saved preconditioner to the matrix it was computed from.
+    """
+    return {
+        'shape': np.load(os.path.join(directory, 'A_shape.npy')).tolist(),
+        'nnz': int(np.load(os.path.join(directory, 'A_data.npy'), mmap_mode='r').size),
+        'mtime_ns': max(
+            os.stat(os.path.join(directory, f'A_{key}.npy')).st_mtime_ns
+            for key in ['data', 'indices', 'indptr', 'shape']
+        ),
+    }
+
+
+def remove_preconditioner(
+    directory: str,
+) -> None:
+    """
+    Deletes the preconditioner files of all kinds (and their metadata) from `directory`.
+    """
+    for filename in ['preconditioner.json'] + [name for names in dict_preconditioner_files.values() for name in names]:
+        if os.path.exists(os.path.join(directory, filename)):
+            os.remove(os.path.join(directory, filename))
+
+
+def build_preconditioner(
+    directory: str,
+    kind: str = 'jacobi',
+    drop_tol: float = 1e-4,
+    fill_factor: float = 5,
+) -> None:
+    """
+    Computes a preconditioner for (I-A) and saves it to `directory`.
+
+    kind = 'jacobi': inverse diagonal of (I-A), computed from the memory map without loading the matrix.
+    kind = 'ilu': incomplete LU factorization (scipy spilu), saved as its L and U factors and permutations.
+    Computing it loads the matrix into memory once and may take minutes for large tables,
+    which is why it is kept on disk for all later solves. Worth it for tables where Jacobi converges slowly.
+
+    A preconditioner of the other kind saved before is deleted. The kind and the description of the matrix
+    (`describe_technology_matrix`) are written to preconditioner.json, last, so that `load_preconditioner`
+    only uses a complete preconditioner of the current matrix.
+    """
+    if kind not in dict_preconditioner_files:
+        raise ValueError("kind must be 'ilu' or 'jacobi'")
+    A = load_technology_matrix(directory)
+    remove_preconditioner(directory)
+    if kind == 'ilu':
+        ilu = sparse_linalg.spilu(
+            (sparse.identity(A.shape[0], format='csc') - A).tocsc(),
+            drop_tol = drop_tol,
+            fill_factor = fill_factor,
+        )
+        sparse.save_npz(os.path.join(directory, 'ilu_L.npz'), ilu.L.tocsr())
+        sparse.save_npz(os.path.join(directory, 'ilu_U.npz'), ilu.U.tocsr())
+        np.save(os.path.join(directory, 'ilu_perm_r.npy'), ilu.perm_r)
+        np.save(os.path.join(directory, 'ilu_perm_c.npy'), ilu.perm_c)
+    elif kind == 'jacobi':
+        np.save(os.path.join(directory, 'jacobi.npy'), 1 / (1 - A.diagonal()))
+    path_metadata = os.path.join(directory, 'preconditioner.json')
+    with open(f'{path_metadata}.{os.getpid()}.tmp', 'w') as file:
+        json.dump({'kind': kind, **describe_technology_matrix(directory)}, file)
+    os.replace(f'{path_metadata}.{os.getpid()}.tmp', path_metadata)
+
+
+def load_preconditioner(
+    directory: str,
+) -> sparse_linalg.LinearOperator:
+    """
+    Returns the preconditioner saved by `build_preconditioner` as a linear operator
+    approximating (I-A)^-1, of the kind recorded in preconditioner.json.
+    Raises a ValueError if there is no preconditioner or if it was computed from another matrix
+    (shape, number of non-zeros or modification time of the saved matrix differ).
+    """
+    path_metadata = os.path.join(directory, 'preconditioner.json')
+    if not os.path.exists(path_metadata):
+        raise ValueError(f"No preconditioner in {directory}; run build_preconditioner first")
+    with open(path_metadata) as file:
+        dict_metadata = json.load(file)
+    if {key: dict_metadata[key] for key in ['shape', 'nnz', 'mtime_ns']} != describe_technology_matrix(directory):
+        raise ValueError(f"The preconditioner in {directory} was computed from another matrix; run build_preconditioner again")
+
+    if dict_metadata['kind'] == 'ilu':
+        L = sparse.load_npz(os.path.join(directory, 'ilu_L.npz'))
+        U = sparse.load_npz(os.path.join(directory, 'ilu_U.npz'))
+        perm_r = np.load(os.path.join(directory, 'ilu_perm_r.npy'))
+        perm_c = np.load(os.path.join(directory, 'ilu_perm_c.npy'))
+
+        def apply_ilu(b):
+            # Pr (I-A) Pc = L U
+            b_permuted = np.empty_like(b)
+            b_permuted[perm_r] = b
+            z = sparse_linalg.spsolve_triangular(L, b_permuted, lower=True, unit_diagonal=True)
+            return sparse_linalg.spsolve_triangular(U, z, lower=False)[perm_c]
+
+        return sparse_linalg.LinearOperator(shape=L.shape, matvec=apply_ilu)
+    jacobi = np.load(os.path.join(directory, 'jacobi.npy'))
+    return sparse_linalg.LinearOperator(shape=(jacobi.size, jacobi.size), matvec=lambda b: jacobi * b)
+
+
+def solve_leontief_blocks(
+    directory: str,
+    Y: np.ndarray,
+    path_output: str,
+    block_size: int = 16,
+    rtol: float = 1e-10,
+) -> np.ndarray:
+    """
+    Solves (I-A) X = Y for all demand vectors (columns of Y) with preconditioned GMRES,
+    reading A from its memory map in `directory`.
+    Y may itself be a memory map; it is read and X is written (to the .npy file `path_output`)
+    `block_size` columns at a time, so only one block of demand vectors is held in memory.
+
+    Returns X as memory map. Raises a ValueError listing the columns that did not converge.
+    """
+    A = load_technology_matrix(directory)
+    preconditioner = load_preconditioner(directory)
+    n = A.shape[0]
+    I_minus_A = sparse_linalg.LinearOperator(
+        shape = (n, n),
+        matvec = lambda v: v - A @ v,
+    )
+
+    Y = Y.reshape(n, -1)
+    X = np.lib.format.open_memmap(path_output, mode='w+', dtype=float, shape=Y.shape)
+    list_not_converged = []
+    for start in range(0, Y.shape[1], block_size):
+        Y_block = np.array(Y[:, start:start + block_size], dtype=float)
+        X_block = np.empty_like(Y_block)
+        for j in range(Y_block.shape[1]):
+            X_block[:, j], info = sparse_linalg.gmres(I_minus_A, Y_block[:, j], M=preconditioner, rtol=rtol)
+            if info != 0:
+                list_not_converged.append(start + j)
+        X[:, start:start + block_size] = X_block
+        X.flush()
+    if list_not_converged:
+        raise ValueError(f"GMRES did not converge for demand vectors {list_not_converged}")
+    return X
@@ -0,0 +1,74 @@
+#%%
+# batched path exchange (PXC) hybrid LCA
+# vectorized version of `fill()` in 3_hlca/2_matplotlib_figures/pxc_barchart, for many paths at once
+
+# IMPORTS #######################################
+
+# data science
+import numpy as np
+
+# FUNCTIONS #####################################
+
+def build_path_array(
+    list_paths: list[list[float]],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Packs paths of different lengths into one (path, order) array of coefficients,
+    e.g. [[1, 0.8, 0.8, 0.8], [1, 0.4]] as in pxc_barchart_1.py.
+    Positions beyond the end of a path are padded with 1, which leaves the cumulative product unchanged.
+    Returns the array and the length of each path.
+    """
+    lengths = np.array([len(path) for path in list_paths])
+    coefficients = np.ones((len(list_paths), lengths.max()))
+    mask = np.arange(lengths.max())[None, :] < lengths[:, None]
+    coefficients[mask] = np.concatenate([np.asarray(path, dtype=float) for path in list_paths])
+    return coefficients, lengths
+
+
+def calculate_tier_flows(
+    coefficients: np.ndarray,
+    y_reference: float | np.ndarray,
+) -> np.ndarray:
+    """
+    Returns the economic flow at each production tier of each path (path, order),
+    i.e. y_reference times the cumulative product of the coefficients along the path.
+    """
+    return np.cumprod(coefficients, axis=1) * np.reshape(y_reference, (-1, 1))
+
+
+def exchange_paths(
+    coefficients_io: np.ndarray,
+    coefficients_process: np.ndarray,
+    lengths: np.ndarray,
+    y_reference: float | np.ndarray,
+    intensities: float | np.ndarray = 1,
+    total_io: float | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Exchanges input-output coefficients of all paths against process coefficients in one pass.
+    `coefficients_process` has the shape of `coefficients_io` and is NaN where the input-output
+    coefficient is kept (e.g. [NaN, 0.4, 0.5, NaN] for the $a^P$ of pxc_barchart_2.py).
+    `intensities` are the emission intensities of the last sector of each path.
+
+    Returns the tier flows before and after the exchange, the path values (flow at the last tier x intensity)
+    before and after the exchange and, if `total_io` is given, the hybrid total
+    total_io - sum(path values before) + sum(path values after).
+    """
+    coefficients_exchanged = np.where(np.isnan(coefficients_process), coefficients_io, coefficients_process)
+    flows_io = calculate_tier_flows(coefficients_io, y_reference)
+    flows_exchanged = calculate_tier_flows(coefficients_exchanged, y_reference)
+
+    last_tier = (np.asarray(lengths) - 1)[:, None]
+    intensities = np.asarray(intensities, dtype=float)
+    path_values_io = np.take_along_axis(flows_io, last_tier, axis=1)[:, 0] * intensities
+    path_values_exchanged = np.take_along_axis(flows_exchanged, last_tier, axis=1)[:, 0] * intensities
+
+    result = {
+        'flows_io': flows_io,
+        'flows_exchanged': flows_exchanged,
+        'path_values_io': path_values_io,
+        'path_values_exchanged': path_values_exchanged,
+    }
+    if total_io is not None:
+        result['total'] = total_io - path_values_io.sum() + path_values_exchanged.sum()
+    return result
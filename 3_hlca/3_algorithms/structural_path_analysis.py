@@ -0,0 +1,110 @@
+#%%
+# structural path analysis (SPA) of input-output tables
+# lists the top-k supply chain paths by best-first search with pruning
+# compare: https://doi.org/10.1017/9781108676212, Section 8.5
+
+# IMPORTS #######################################
+
+# sys
+import heapq
+# data science
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+import scipy.sparse.linalg as sparse_linalg
+
+# FUNCTIONS #####################################
+
+def calculate_total_intensities(
+    A: np.ndarray | sparse.spmatrix,
+    f: np.ndarray,
+) -> np.ndarray:
+    """
+    Returns the total (direct + upstream) intensities m = f (I-A)^-1,
+    by solving (I-A)^T m^T = f^T instead of forming the inverse.
+    Sparse tables are solved iteratively (BiCGSTAB), since a direct factorization
+    of large input-output tables suffers from heavy fill-in.
+    """
+    n = A.shape[0]
+    if sparse.issparse(A):
+        I_minus_A_T = (sparse.identity(n, format='csr') - A).T.tocsr()
+        m, info = sparse_linalg.bicgstab(I_minus_A_T, f, rtol = 1e-12)
+        if info != 0:
+            m = sparse_linalg.spsolve(I_minus_A_T.tocsc(), f)
+        return m
+    return np.linalg.solve((np.identity(n) - A).T, f)
+
+
+def find_top_paths(
+    A: np.ndarray | sparse.spmatrix,
+    y: np.ndarray,
+    f: np.ndarray | None = None,
+    top_k: int = 100,
+    cutoff: float = 1e-6,
+    max_order: int = 10,
+) -> pd.DataFrame:
+    """
+    Returns the `top_k` supply chain paths with the largest contributions f[s_k] A[s_k, s_k-1] ... A[s_1, s_0] y[s_0],
+    where A is the technology matrix, y the final demand and f the direct intensities (default: ones, i.e. output).
+
+    Nodes of the path tree are expanded best-first, ordered by the upper bound of everything
+    upstream of a node (flow into the node x total intensity of the node).
+    Subtrees are pruned if this bound is below `cutoff` x total impact,
+    beyond `max_order` or once it cannot beat the k-th best path found so far.
+    A may be dense or sparse; it is converted to CSC, so that the inputs to a sector are one column slice.
+    Pruning assumes non-negative A, y and f (as in environmentally-extended input-output tables).
+
+    Returns a DataFrame sorted by contribution with columns
+    'path' (tuple of sectors, from final demand upstream), 'order', 'contribution' and 'share' (of the total impact).
+    """
+    A = sparse.csc_matrix(A)
+    A.eliminate_zeros()
+    y = np.asarray(y, dtype=float)
+    f = np.ones(A.shape[0]) if f is None else np.asarray(f, dtype=float)
+
+    m = calculate_total_intensities(A, f)
+    total_impact = m @ y
+    threshold = cutoff * abs(total_impact)
+
+    # max-heap via negative bounds: (-bound, tie breaker, flow, path)
+    queue = []
+    counter = 0
+    for sector in np.flatnonzero(y):
+        bound = y[sector] * m[sector]
+        if abs(bound) >= threshold:
+            heapq.heappush(queue, (-abs(bound), counter, y[sector], (int(sector),)))
+            counter += 1
+
+    # min-heap of the best paths found so far: (|contribution|, tie breaker, contribution, path)
+    top_paths = []
+    while queue:
+        negative_bound, _, flow, path = heapq.heappop(queue)
+        if len(top_paths) == top_k and -negative_bound <= top_paths[0][0]:
+            break # no remaining subtree can improve the top-k paths
+        node = path[-1]
+        contribution = flow * f[node]
+        if contribution != 0:
+            entry = (abs(contribution), counter, contribution, path)
+            if len(top_paths) < top_k:
+                heapq.heappush(top_paths, entry)
+            elif entry[0] > top_paths[0][0]:
+                heapq.heapreplace(top_paths, entry)
+        if len(path) - 1 >= max_order:
+            continue
+        start, end = A.indptr[node], A.indptr[node + 1]
+        suppliers = A.indices[start:end]
+        flows_upstream = flow * A.data[start:end]
+        bounds = np.abs(flows_upstream * m[suppliers])
+        for supplier, flow_upstream, bound in zip(suppliers, flows_upstream, bounds):
+            if bound >= threshold:
+                counter += 1
+                heapq.heappush(queue, (-bound, counter, flow_upstream, path + (int(supplier),)))
+
+    top_paths = sorted(top_paths, reverse=True)
+    df_paths = pd.DataFrame({
+        'path': [entry[3] for entry in top_paths],
+        'order': [len(entry[3]) - 1 for entry in top_paths],
+        'contribution': [entry[2] for entry in top_paths],
+    })
+    df_paths['share'] = df_paths['contribution'] / total_impact
+    return df_paths
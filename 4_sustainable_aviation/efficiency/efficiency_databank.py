@@ -0,0 +1,172 @@
+#%%
+# shared databank of the aircraft efficiency workbooks, for the efficiency_* figures
+# the workbooks are parsed once into uncompressed Arrow IPC (Feather v2) files, which every figure
+# (and every parallel worker process) memory-maps: numeric columns are read zero-copy from the OS page cache
+#
+# usage from a figure script (scripts are run from their own directory):
+#   import sys; sys.path.append('../efficiency')
+#   from efficiency_databank import load_databank
+#   df_eff = load_databank('aircraft', columns = ['Name', 'Type', 'YOI', 'TSFC Cruise', 'B/P Ratio'])
+
+# IMPORTS #######################################
+
+# sys
+import os
+import json
+# i/o
+from pathlib import Path
+# data science
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+# DATA ##########################################
+
+path_efficiency: Path = Path(__file__).resolve().parent
+path_cache_default: Path = Path.home() / '.cache' / 'phd_publication_figures' / 'efficiency'
+
+# table name: (workbook, sheet)
+dict_tables: dict[str, tuple[Path, str]] = {
+    'aircraft': (path_efficiency / 'data' / 'data_29-11-2023.xlsx', 'data'),
+    'dashboard': (path_efficiency / 'data' / 'data_dashboard_29-11-2023.xlsx', 'Sheet1'),
+}
+
+# FUNCTIONS #####################################
+
+def get_path_cache(
+    path_cache: Path = path_cache_default,
+) -> Path | None:
+    """
+    Databank directory: `path_cache`, or the 'efficiency' subdirectory of the PHD_FIGURES_CACHE environment variable;
+    None if PHD_FIGURES_CACHE is set to an empty string (caching disabled).
+    """
+    if os.environ.get('PHD_FIGURES_CACHE') == '':
+        return None
+    if 'PHD_FIGURES_CACHE' in os.environ:
+        return Path(os.environ['PHD_FIGURES_CACHE']) / 'efficiency'
+    return path_cache
+
+
+def read_table_workbook(
+    table: str,
+) -> pd.DataFrame:
+    path_workbook, sheet_name = dict_tables[table]
+    return pd.read_excel(
+        io = path_workbook,
+        sheet_name = sheet_name,
+        header = 0,
+        engine = 'openpyxl',
+    )
+
+
+def dataframe_to_arrow(
+    df: pd.DataFrame,
+) -> pa.Table:
+    """
+    Converts a sheet to an Arrow table that can be memory-mapped zero-copy:
+    numeric columns keep NaN as values (no validity bitmap, which would force a copy on conversion to numpy),
+    text columns are dictionary encoded (read back as categorical).
+    """
+    dict_arrays = {}
+    for column in df.columns:
+        if pd.api.types.is_numeric_dtype(df[column]):
+            dict_arrays[str(column)] = pa.array(df[column].to_numpy(), from_pandas=False)
+        else:
+            dict_arrays[str(column)] = pa.array(df[column].astype(object).where(df[column].notna(), None)).dictionary_encode()
+    return pa.table(dict_arrays)
+
+
+def is_databank_current(
+    path_table: Path,
+    path_workbook: Path,
+) -> bool:
+    path_metadata = path_table.with_suffix('.json')
+    if not path_table.exists() or not path_metadata.exists():
+        return False
+    dict_metadata = json.loads(path_metadata.read_text())
+    stat = path_workbook.stat()
+    return dict_metadata['mtime_ns'] == stat.st_mtime_ns and dict_metadata['size'] == stat.st_size
+
+
+def build_databank(
+    path_cache: Path = path_cache_default,
+    force: bool = False,
+) -> dict[str, Path]:
+    """
+    Parses the efficiency workbooks of `dict_tables` into uncompressed Arrow IPC files (one per table),
+    unless they are already current (workbook modification time and size unchanged) or `force`.
+    Run this once before starting parallel figure builds, so that the workers only read.
+    Files are written to temporary files and renamed, so that concurrent workers never read half a file.
+    Returns {table name: path of the Arrow file} (empty if caching is disabled, see `get_path_cache`).
+    """
+    path_cache = get_path_cache(path_cache)
+    if path_cache is None:
+        return {}
+    path_cache.mkdir(parents=True, exist_ok=True)
+    dict_paths = {}
+    for table, (path_workbook, sheet_name) in dict_tables.items():
+        path_table = path_cache / f'{table}.arrow'
+        dict_paths[table] = path_table
+        if not force and is_databank_current(path_table, path_workbook):
+            continue
+        arrow_table = dataframe_to_arrow(read_table_workbook(table))
+        path_temporary = path_table.with_name(f'{table}.{os.getpid()}.tmp.arrow')
+        with pa.OSFile(str(path_temporary), 'wb') as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer: # uncompressed, so it can be memory-mapped
+                writer.write_table(arrow_table)
+        os.replace(path_temporary, path_table)
+        stat = path_workbook.stat()
+        path_temporary = path_table.with_name(f'{table}.{os.getpid()}.tmp.json')
+        path_temporary.write_text(json.dumps({
+            'workbook': str(path_workbook),
+            'sheet_name': sheet_name,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+        }))
+        os.replace(path_temporary, path_table.with_suffix('.json'))
+    return dict_paths
+
+
+def load_databank_arrow(
+    table: str,
+    columns: list[str] | None = None,
+    path_cache: Path = path_cache_default,
+) -> pa.Table:
+    """
+    Returns a table of the databank as Arrow table backed by a memory map of its file (no data is copied).
+    Builds the databank first if it is missing or outdated.
+    With caching disabled (see `get_path_cache`), the table is read from its workbook into memory instead.
+    """
+    if table not in dict_tables:
+        raise ValueError(f"Unknown table '{table}'; tables: {list(dict_tables)}")
+    if get_path_cache(path_cache) is None:
+        arrow_table = dataframe_to_arrow(read_table_workbook(table))
+    else:
+        path_table = get_path_cache(path_cache) / f'{table}.arrow'
+        if not is_databank_current(path_table, dict_tables[table][0]):
+            build_databank(path_cache)
+        arrow_table = pa.ipc.open_file(pa.memory_map(str(path_table), 'r')).read_all()
+    if columns is not None:
+        missing = set(columns) - set(arrow_table.column_names)
+        if missing:
+            raise ValueError(f"Columns {sorted(missing)} not found in table '{table}'")
+        arrow_table = arrow_table.select(columns)
+    return arrow_table
+
+
+def load_databank(
+    table: str,
+    columns: list[str] | None = None,
+    path_cache: Path = path_cache_default,
+) -> pd.DataFrame:
+    """
+    Returns a table of the databank ('aircraft': data_29-11-2023.xlsx, 'dashboard': data_dashboard_29-11-2023.xlsx)
+    as DataFrame with the requested `columns` (all if None).
+    Numeric columns are read-only views into the memory map (zero-copy); text columns are categorical.
+    Use `.copy()` before modifying numeric columns in place.
+    """
+    arrow_table = load_databank_arrow(table, columns, path_cache)
+    return arrow_table.to_pandas(
+        split_blocks = True, # one block per column, so numeric columns are not consolidated (copied)
+        zero_copy_only = False,
+    )
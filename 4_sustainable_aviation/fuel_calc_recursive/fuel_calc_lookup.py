@@ -0,0 +1,138 @@
+#%%
+# precomputed lookup table of the converged fuel mass of the model in fuel_calc_recursive.py
+# the table is built once per set of coefficients and queried by bilinear interpolation
+
+# IMPORTS #######################################
+
+# data science
+import numpy as np
+# fuel model
+from fuel_calc_vectorized import (
+    coefficients_default,
+    solve_mission_grid_converged,
+)
+
+# FUNCTIONS #####################################
+
+def build_fuel_table(
+    zero_fuel_mass_min: float = 20_000, # kg
+    zero_fuel_mass_max: float = 300_000, # kg
+    distance_min: float = 100, # km
+    distance_max: float = 15_000, # km
+    n_zero_fuel_mass: int = 561,
+    n_distance: int = 1491,
+    coefficients: dict[str, float] = coefficients_default,
+    n_subgrid: int = 4,
+    safety_factor: float = 1.25,
+) -> dict[str, np.ndarray]:
+    """
+    Solves the fuel mass model on a uniform (zero-fuel mass, distance) grid.
+    Zero-fuel mass = oew + pax * paxweight, i.e. the mass before fuel is added,
+    which together with the distance fully determines the converged fuel mass.
+
+    The returned table also holds 'max_relative_error', an upper estimate of the relative error
+    of `lookup_fuel_mass` against the exact solution: the largest error on a `n_subgrid` x `n_subgrid` sub-grid
+    of every cell (offsets 0, 1/4, 1/2, 3/4 of the cell size, which includes the cell centres and edge midpoints,
+    where the bilinear interpolation error of a smooth surface peaks), times `safety_factor`
+    for the error between sub-grid points.
+    With the default grid (500 kg x 10 km cells) and coefficients, this is below 1e-5.
+    """
+    zero_fuel_mass = np.linspace(zero_fuel_mass_min, zero_fuel_mass_max, n_zero_fuel_mass)
+    distance = np.linspace(distance_min, distance_max, n_distance)
+    table = {
+        'zero_fuel_mass': zero_fuel_mass,
+        'distance': distance,
+        'total_fuel_mass': solve_exact(zero_fuel_mass[:, None], distance[None, :], coefficients),
+        'coefficients': np.array([coefficients[key] for key in coefficients_default.keys()]),
+    }
+    max_relative_error = 0
+    for offset_mass in np.arange(n_subgrid) / n_subgrid:
+        for offset_distance in np.arange(n_subgrid) / n_subgrid:
+            if offset_mass == 0 and offset_distance == 0:
+                continue # grid nodes are exact
+            sample_zero_fuel_mass = zero_fuel_mass[:-1] + offset_mass * (zero_fuel_mass[1] - zero_fuel_mass[0])
+            sample_distance = distance[:-1] + offset_distance * (distance[1] - distance[0])
+            exact = solve_exact(sample_zero_fuel_mass[:, None], sample_distance[None, :], coefficients)
+            interpolated = lookup_fuel_mass(table, sample_zero_fuel_mass[:, None], sample_distance[None, :])
+            max_relative_error = max(max_relative_error, np.max(np.abs(interpolated - exact) / exact))
+    table['max_relative_error'] = np.array(safety_factor * max_relative_error)
+    return table
+
+
+def solve_exact(
+    zero_fuel_mass: np.ndarray,
+    distance: np.ndarray,
+    coefficients: dict[str, float] = coefficients_default,
+) -> np.ndarray:
+    total_fuel_mass, _, diagnostics = solve_mission_grid_converged(
+        distance = distance,
+        pax = 1,
+        oew = zero_fuel_mass,
+        paxweight = 0,
+        method = 'newton',
+        tolerance = 1e-6,
+        coefficients = coefficients,
+    )
+    if not diagnostics['converged'].all():
+        raise ValueError("Fuel mass model did not converge on the whole table range")
+    return total_fuel_mass
+
+
+def save_fuel_table(
+    table: dict[str, np.ndarray],
+    path: str,
+) -> None:
+    np.savez(path, **table)
+
+
+def load_fuel_table(
+    path: str,
+    coefficients: dict[str, float] = coefficients_default,
+) -> dict[str, np.ndarray]:
+    """
+    Loads a table saved by `save_fuel_table` and checks that it was built for `coefficients`.
+    """
+    with np.load(path) as file:
+        table = {key: file[key] for key in file.files}
+    expected = np.array([coefficients[key] for key in coefficients_default.keys()])
+    if not np.array_equal(table['coefficients'], expected):
+        raise ValueError(
+            f"Fuel table {path} was built for other coefficients: "
+            f"{dict(zip(coefficients_default.keys(), table['coefficients'].tolist()))}"
+        )
+    return table
+
+
+def lookup_fuel_mass(
+    table: dict[str, np.ndarray],
+    zero_fuel_mass: np.ndarray,
+    distance: np.ndarray,
+) -> np.ndarray:
+    """
+    Bilinear interpolation of the converged fuel mass [kg] for arrays of
+    zero-fuel masses [kg] and distances [km] (broadcast against each other).
+    Since the grid is uniform, the cell of each query is found by arithmetic, not by search.
+    Queries outside of the table range return NaN.
+    """
+    axis_mass = table['zero_fuel_mass']
+    axis_distance = table['distance']
+    values = table['total_fuel_mass']
+
+    position_mass = (np.asarray(zero_fuel_mass, dtype=float) - axis_mass[0]) / (axis_mass[1] - axis_mass[0])
+    position_distance = (np.asarray(distance, dtype=float) - axis_distance[0]) / (axis_distance[1] - axis_distance[0])
+    outside = (
+        (position_mass < 0) | (position_mass > axis_mass.size - 1) |
+        (position_distance < 0) | (position_distance > axis_distance.size - 1)
+    )
+    i = np.clip(np.floor(np.nan_to_num(position_mass)).astype(int), 0, axis_mass.size - 2)
+    j = np.clip(np.floor(np.nan_to_num(position_distance)).astype(int), 0, axis_distance.size - 2)
+    t = position_mass - i
+    u = position_distance - j
+
+    total_fuel_mass = (
+        (1 - t) * (1 - u) * values[i, j] +
+        t * (1 - u) * values[i + 1, j] +
+        (1 - t) * u * values[i, j + 1] +
+        t * u * values[i + 1, j + 1]
+    )
+    return np.where(outside, np.nan, total_fuel_mass)
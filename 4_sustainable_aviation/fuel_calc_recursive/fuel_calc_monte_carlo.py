@@ -0,0 +1,119 @@
+#%%
+# monte carlo uncertainty propagation through the fuel mass model in fuel_calc_recursive.py
+# all samples of all missions are solved as one array operation
+
+# IMPORTS #######################################
+
+# sys
+import warnings
+# data science
+import numpy as np
+# fuel model
+from fuel_calc_vectorized import (
+    coefficients_default,
+    paxweight,
+    solve_mission_grid_converged,
+)
+
+# FUNCTIONS #####################################
+
+def sample_parameters(
+    distributions: dict[str, tuple],
+    n_samples: int,
+    seed: int | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Draws `n_samples` values for each uncertain parameter.
+    Distributions are given as (name, *parameters) of a `numpy.random.Generator` method, e.g.:
+
+        distributions = {
+            'a_cruise': ('normal', 0.0000585830319747814, 0.000002),
+            'paxweight': ('uniform', 100, 120),
+            'holding_time': ('triangular', 30/60, 45/60, 60/60),
+        }
+
+    Valid keys are those of `coefficients_default` and 'paxweight'.
+    Parameters without a distribution keep their default (point) value.
+    """
+    valid_keys = list(coefficients_default.keys()) + ['paxweight']
+    unknown = [key for key in distributions.keys() if key not in valid_keys]
+    if unknown:
+        raise ValueError(f"No such parameter(s) in the fuel mass model: {unknown}")
+
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for key, (name, *parameters) in distributions.items():
+        samples[key] = getattr(rng, name)(*parameters, size=n_samples)
+    return samples
+
+
+def propagate_uncertainty(
+    distance: np.ndarray,
+    pax: np.ndarray,
+    oew: np.ndarray,
+    distributions: dict[str, tuple],
+    n_samples: int = 100_000,
+    percentiles: tuple[float, ...] = (5, 25, 50, 75, 95),
+    batch_size: int = 1_000_000,
+    seed: int | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Solves the fuel mass model for `n_samples` parameter sets x all missions
+    (`distance`, `pax`, `oew` are 1-D arrays of equal length, one entry per mission).
+    The (sample, mission) array is solved in blocks of at most `batch_size` entries, which bounds the memory
+    of the solver's intermediate arrays; the two (n_samples, missions) float64 result arrays are always allocated in full,
+    since the percentiles are computed over all samples.
+
+    Samples for which the model does not converge (e.g. parameter sets for which the fuel mass diverges)
+    have no solution; they are rejected (with a warning) and the percentiles are computed over the remaining samples.
+
+    Returns the percentiles (rows) per mission (columns) of the total fuel mass [kg]
+    and of the fuel per 100 pax-km [l], together with the percentile levels
+    and the number ('rejected') and share ('rejected_share') of rejected samples per mission.
+    """
+    distance, pax, oew = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(distance, dtype=float)),
+        np.atleast_1d(np.asarray(pax, dtype=float)),
+        np.atleast_1d(np.asarray(oew, dtype=float)),
+    )
+    samples = sample_parameters(distributions, n_samples, seed)
+    coefficients = {key: samples.get(key, value) for key, value in coefficients_default.items()}
+    paxweight_samples = samples.get('paxweight', np.full(n_samples, paxweight))
+
+    total_fuel_mass = np.empty((n_samples, distance.size))
+    fuel_per_100_pax_km = np.empty((n_samples, distance.size))
+    converged = np.empty((n_samples, distance.size), dtype=bool)
+    samples_per_batch = max(1, batch_size // distance.size)
+    for start in range(0, n_samples, samples_per_batch):
+        batch = slice(start, min(start + samples_per_batch, n_samples))
+        coefficients_batch = {
+            key: value[batch, None] if np.ndim(value) > 0 else value
+            for key, value in coefficients.items()
+        }
+        total_fuel_mass[batch], fuel_per_100_pax_km[batch], diagnostics = solve_mission_grid_converged(
+            distance = distance[None, :],
+            pax = pax[None, :],
+            oew = oew[None, :],
+            paxweight = paxweight_samples[batch, None],
+            method = 'newton',
+            coefficients = coefficients_batch,
+        )
+        converged[batch] = diagnostics['converged']
+
+    total_fuel_mass[~converged] = np.nan
+    fuel_per_100_pax_km[~converged] = np.nan
+    rejected = (~converged).sum(axis=0)
+    if rejected.any():
+        warnings.warn(
+            f"{rejected.sum()} of {converged.size} samples did not converge and were rejected "
+            f"(up to {rejected.max() / n_samples:.1%} of the samples of a mission)"
+        )
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning) # missions without any converged sample get NaN percentiles
+        return {
+            'percentiles': np.asarray(percentiles),
+            'total_fuel_mass': np.nanpercentile(total_fuel_mass, percentiles, axis=0),
+            'fuel_per_100_pax_km': np.nanpercentile(fuel_per_100_pax_km, percentiles, axis=0),
+            'rejected': rejected,
+            'rejected_share': rejected / n_samples,
+        }
@@ -0,0 +1,118 @@
+#%%
+# fuel estimate for a full airline schedule, based on the model in fuel_calc_recursive.py
+# the schedule is read and solved in fixed-size batches, so memory use does not depend on its length
+
+# IMPORTS #######################################
+
+# sys
+import os
+# data science
+import pandas as pd
+# fuel model
+from fuel_calc_vectorized import (
+    coefficients_default,
+    paxweight,
+    solve_mission_grid_converged,
+)
+
+# FUNCTIONS #####################################
+
+def read_schedule_batches(
+    path_schedule: str,
+    batch_size: int = 100_000,
+):
+    """
+    Yields the schedule (csv with columns 'aircraft type', 'pax', 'distance [km]')
+    in DataFrames of at most `batch_size` legs.
+    """
+    yield from pd.read_csv(
+        filepath_or_buffer = path_schedule,
+        usecols = ['aircraft type', 'pax', 'distance [km]'],
+        dtype = {
+            'aircraft type': str,
+            'pax': float,
+            'distance [km]': float,
+        },
+        chunksize = batch_size,
+    )
+
+
+def solve_schedule_batch(
+    df_batch: pd.DataFrame,
+    df_aircraft: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Solves all legs of one schedule batch at once.
+
+    `df_aircraft` is indexed by aircraft type and has a column 'oew [kg]'.
+    Optional columns named like the keys of `coefficients_default` ('a_cruise', 'b_cruise', ...)
+    and 'paxweight [kg]' override the default values per aircraft type.
+    """
+    type_index = df_aircraft.index.get_indexer(df_batch['aircraft type'])
+    if (type_index == -1).any():
+        unknown = df_batch['aircraft type'][type_index == -1].unique()
+        raise ValueError(f"Aircraft types missing from aircraft table: {list(unknown)}")
+
+    coefficients = {
+        key: df_aircraft[key].to_numpy(dtype=float)[type_index] if key in df_aircraft.columns else value
+        for key, value in coefficients_default.items()
+    }
+    if 'paxweight [kg]' in df_aircraft.columns:
+        paxweight_legs = df_aircraft['paxweight [kg]'].to_numpy(dtype=float)[type_index]
+    else:
+        paxweight_legs = paxweight
+
+    total_fuel_mass, fuel_per_100_pax_km, diagnostics = solve_mission_grid_converged(
+        distance = df_batch['distance [km]'].to_numpy(),
+        pax = df_batch['pax'].to_numpy(),
+        oew = df_aircraft['oew [kg]'].to_numpy(dtype=float)[type_index],
+        paxweight = paxweight_legs,
+        method = 'newton',
+        coefficients = coefficients,
+    )
+    df_result = df_batch.copy()
+    df_result['fuel mass [kg]'] = total_fuel_mass
+    df_result['fuel per 100 pax-km [l]'] = fuel_per_100_pax_km
+    df_result['converged'] = diagnostics['converged']
+    return df_result
+
+
+def estimate_schedule_fuel(
+    path_schedule: str,
+    df_aircraft: pd.DataFrame,
+    path_output: str | None = None,
+    batch_size: int = 100_000,
+) -> pd.DataFrame:
+    """
+    Streams the schedule through `solve_schedule_batch`.
+    Per-leg results are appended to the csv `path_output` batch by batch (if given);
+    only the running totals per aircraft type are kept in memory.
+
+    Returns a DataFrame indexed by aircraft type with
+    'legs', 'pax', 'distance [km]', 'fuel mass [kg]' and 'not converged' totals.
+    Legs that did not converge have no fuel mass (NaN) and are left out of the fuel mass total.
+    """
+    if path_output is not None and os.path.exists(path_output):
+        os.remove(path_output)
+
+    df_totals = pd.DataFrame(
+        data = 0.0,
+        index = df_aircraft.index,
+        columns = ['legs', 'pax', 'distance [km]', 'fuel mass [kg]', 'not converged'],
+    )
+    for df_batch in read_schedule_batches(path_schedule, batch_size):
+        df_result = solve_schedule_batch(df_batch, df_aircraft)
+        if path_output is not None:
+            df_result.to_csv(
+                path_or_buf = path_output,
+                mode = 'a',
+                header = not os.path.exists(path_output),
+                index = False,
+            )
+        df_result['legs'] = 1
+        df_result['not converged'] = ~df_result['converged']
+        df_totals = df_totals.add(
+            df_result.groupby('aircraft type')[list(df_totals.columns)].sum(),
+            fill_value = 0,
+        )
+    return df_totals
@@ -0,0 +1,235 @@
+#%%
+# vectorized version of the fuel mass model in fuel_calc_recursive.py
+# solves whole grids of missions (distance x pax x oew) at once
+
+# IMPORTS #######################################
+
+# data science
+import numpy as np
+
+# PARAMETERS ####################################
+
+density_fuel = 0.8 # kg/l
+paxweight = 110 # kg
+
+# https://zenodo.org/record/8059751
+# “Supplementary data 1.xlsb”, sheet "Aircraft specs", row 84
+coefficients_default: dict[str, float] = {
+    'a_cruise': 0.0000585830319747814,
+    'b_cruise': 0.97618365400094,
+    'c_cruise': 0.783563064133963,
+    'a_toldg': 0.0904737898235621,
+    'b_toldg': 0.850276475663708,
+    'a_clbdsc': 1.14401077847832,
+    'b_clbdsc': 0.537401800486297,
+    'holding_speed': 800, # km/h
+    'holding_time': 45/60, # h
+}
+
+# FUNCTIONS #####################################
+
+def calculate_total_fuel_mass(
+    total_mass: np.ndarray,
+    distance: np.ndarray,
+    coefficients: dict[str, float | np.ndarray] = coefficients_default,
+) -> np.ndarray:
+    """
+    Array version of `calculate_total_fuel_mass` in fuel_calc_recursive.py.
+    All arguments (including the coefficients) are broadcast against each other.
+
+    See also:
+    https://zenodo.org/record/8059751
+    “Supplementary data 1.xlsb”, sheet "Aircraft specs", row 84
+    """
+    c = coefficients
+    fuel_per_km_cruise = c['a_cruise'] * np.power(total_mass, c['b_cruise']) + c['c_cruise']
+    m_fuel_cruise = fuel_per_km_cruise * distance
+    m_fuel_toldg = c['a_toldg'] * np.power(total_mass, c['b_toldg'])
+    m_fuel_clbdsc = c['a_clbdsc'] * np.power(total_mass, c['b_clbdsc'])
+    m_reserve = (c['holding_speed'] * c['holding_time']) * fuel_per_km_cruise
+    return m_fuel_cruise + m_fuel_toldg + m_fuel_clbdsc + m_reserve
+
+
+def calculate_operating_weight(
+    total_fuel_mass: np.ndarray,
+    pax: np.ndarray,
+    paxweight: float | np.ndarray,
+    oew: np.ndarray
+) -> np.ndarray:
+    """
+    See also:
+    https://zenodo.org/record/8059751
+    “Supplementary data 1.xlsb”, sheet "Scenarios", cell AG8
+    """
+    return oew + (pax * paxweight) + total_fuel_mass
+
+
+def calculate_fuel_per_100_pax_km(
+    total_fuel_mass: np.ndarray,
+    distance: np.ndarray,
+    pax: np.ndarray
+) -> np.ndarray:
+    total_fuel_volume = total_fuel_mass / density_fuel
+    return (total_fuel_volume / (distance * pax)) * 100
+
+
+def solve_mission_grid(
+    distance: np.ndarray,
+    pax: np.ndarray,
+    oew: np.ndarray,
+    paxweight: float | np.ndarray = paxweight,
+    iterations: int = 10,
+    coefficients: dict[str, float | np.ndarray] = coefficients_default,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Runs the fixed-point iteration of fuel_calc_recursive.py
+    on all missions at once. `distance`, `pax` and `oew` follow the NumPy broadcasting rules,
+    so that a full grid can be passed as open (sparse) arrays, e.g.:
+
+        distance, pax, oew = np.ix_(list_distance, list_pax, list_oew)
+
+    Returns the total fuel mass [kg] and the fuel per 100 pax-km [l],
+    both with the broadcast shape of the inputs.
+    """
+    distance = np.asarray(distance, dtype=float)
+    pax = np.asarray(pax, dtype=float)
+    oew = np.asarray(oew, dtype=float)
+
+    # mass without fuel does not change between iterations
+    zero_fuel_mass = calculate_operating_weight(
+        total_fuel_mass = 0,
+        pax = pax,
+        paxweight = paxweight,
+        oew = oew
+    )
+    shape = np.broadcast_shapes(distance.shape, zero_fuel_mass.shape)
+    total_fuel_mass = np.zeros(shape) # kg, initialization
+    for x in range(iterations):
+        total_mass = zero_fuel_mass + total_fuel_mass
+        total_fuel_mass = calculate_total_fuel_mass(
+            total_mass = total_mass,
+            distance = distance,
+            coefficients = coefficients
+        )
+    fuel_per_100_pax_km = calculate_fuel_per_100_pax_km(
+        total_fuel_mass = total_fuel_mass,
+        distance = distance,
+        pax = pax
+    )
+    return total_fuel_mass, fuel_per_100_pax_km
+
+
+def calculate_total_fuel_mass_derivative(
+    total_mass: np.ndarray,
+    distance: np.ndarray,
+    coefficients: dict[str, float | np.ndarray] = coefficients_default,
+) -> np.ndarray:
+    """
+    Analytic derivative d(total fuel mass)/d(total mass) of `calculate_total_fuel_mass`.
+    Each power law a*m**b contributes a*b*m**(b-1).
+    """
+    c = coefficients
+    holding_distance = c['holding_speed'] * c['holding_time']
+    d_cruise = c['a_cruise'] * c['b_cruise'] * np.power(total_mass, c['b_cruise'] - 1) * (distance + holding_distance)
+    d_toldg = c['a_toldg'] * c['b_toldg'] * np.power(total_mass, c['b_toldg'] - 1)
+    d_clbdsc = c['a_clbdsc'] * c['b_clbdsc'] * np.power(total_mass, c['b_clbdsc'] - 1)
+    return d_cruise + d_toldg + d_clbdsc
+
+
+def solve_mission_grid_converged(
+    distance: np.ndarray,
+    pax: np.ndarray,
+    oew: np.ndarray,
+    paxweight: float | np.ndarray = paxweight,
+    method: str = 'newton',
+    tolerance: float = 1e-3, # kg
+    max_iterations: int = 100,
+    coefficients: dict[str, float | np.ndarray] = coefficients_default,
+) -> tuple[np.ndarray, np.ndarray, dict]:
+    """
+    Same as `solve_mission_grid`, but iterates each mission only until
+    the residual |F(m_zero_fuel + m_fuel) - m_fuel| is below `tolerance` [kg].
+
+    method = 'fixed-point' repeats the update of fuel_calc_recursive.py,
+    method = 'newton' uses the analytic derivative of the power laws:
+
+        m_fuel <- m_fuel - residual / (dF/dm - 1)
+
+    Converged missions are dropped from the active set, so that each mission
+    only costs the iterations it needs.
+
+    Returns the total fuel mass [kg], the fuel per 100 pax-km [l] and a diagnostics dict with
+    'iterations' (per mission), 'converged' (per mission, False if diverged or not converged
+    after `max_iterations`) and 'residuals' (max. absolute residual over the active missions, per iteration).
+    Missions that did not converge have no valid solution: their fuel mass and fuel per 100 pax-km are NaN.
+    """
+    if method not in ['fixed-point', 'newton']:
+        raise ValueError("method must be 'fixed-point' or 'newton'")
+
+    distance, pax, oew, paxweight = np.broadcast_arrays(
+        np.asarray(distance, dtype=float),
+        np.asarray(pax, dtype=float),
+        np.asarray(oew, dtype=float),
+        np.asarray(paxweight, dtype=float),
+    )
+    shape = distance.shape
+    coefficients_flat = {
+        key: np.broadcast_to(value, shape).ravel() if np.ndim(value) > 0 else value
+        for key, value in coefficients.items()
+    }
+    distance_flat = distance.ravel()
+    zero_fuel_mass = calculate_operating_weight(
+        total_fuel_mass = 0,
+        pax = pax.ravel(),
+        paxweight = paxweight.ravel(),
+        oew = oew.ravel()
+    )
+
+    total_fuel_mass = np.zeros(distance_flat.size) # kg, initialization
+    iterations = np.zeros(distance_flat.size, dtype=int)
+    converged = np.zeros(distance_flat.size, dtype=bool)
+    list_residuals = []
+
+    active = np.arange(distance_flat.size)
+    for x in range(max_iterations):
+        if active.size == 0:
+            break
+        coefficients_active = {
+            key: value[active] if np.ndim(value) > 0 else value
+            for key, value in coefficients_flat.items()
+        }
+        total_mass = zero_fuel_mass[active] + total_fuel_mass[active]
+        fuel_mass_update = calculate_total_fuel_mass(
+            total_mass = total_mass,
+            distance = distance_flat[active],
+            coefficients = coefficients_active
+        )
+        residual = fuel_mass_update - total_fuel_mass[active]
+        if method == 'newton':
+            slope = calculate_total_fuel_mass_derivative(
+                total_mass = total_mass,
+                distance = distance_flat[active],
+                coefficients = coefficients_active
+            )
+            fuel_mass_update = total_fuel_mass[active] - residual / (slope - 1)
+        total_fuel_mass[active] = fuel_mass_update
+        iterations[active] += 1
+        list_residuals.append(np.max(np.abs(residual)))
+
+        done = np.abs(residual) < tolerance
+        converged[active[done]] = True
+        diverged = ~np.isfinite(fuel_mass_update) | (fuel_mass_update < 0)
+        active = active[~done & ~diverged]
+    total_fuel_mass[~converged] = np.nan # last iterate of diverged/unconverged missions is not a solution
+
+    fuel_per_100_pax_km = calculate_fuel_per_100_pax_km(
+        total_fuel_mass = total_fuel_mass,
+        distance = distance_flat,
+        pax = pax.ravel()
+    )
+    diagnostics = {
+        'iterations': iterations.reshape(shape),
+        'converged': converged.reshape(shape),
+        'residuals': np.array(list_residuals),
+    }
+    return total_fuel_mass.reshape(shape), fuel_per_100_pax_km.reshape(shape), diagnostics
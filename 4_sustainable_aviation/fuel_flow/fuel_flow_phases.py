@@ -0,0 +1,179 @@
+#%%
+# automatic flight phase segmentation and fuel integration of fuel flow traces
+# traces are streamed in chunks, so that recorded logs of any length can be processed
+
+# IMPORTS #######################################
+
+# data science
+import numpy as np
+import pandas as pd
+
+# FUNCTIONS #####################################
+
+def read_fuel_flow_chunks(
+    path: str,
+    chunk_size: int = 1_000_000,
+):
+    """
+    Yields (time, ff) arrays of a fuel flow trace csv with the columns of data/data.csv
+    ('time' [h], 'ff' [kg/s]), sorted by time.
+    """
+    for df_chunk in pd.read_csv(
+        filepath_or_buffer = path,
+        usecols = ['time', 'ff'],
+        dtype = {'time': float, 'ff': float},
+        chunksize = chunk_size,
+    ):
+        yield df_chunk['time'].to_numpy(), df_chunk['ff'].to_numpy()
+
+
+def cumulative_trapezoid_chunks(
+    chunks,
+):
+    """
+    Yields (time, ff, cumulative fuel) per chunk, where the cumulative trapezoid sum
+    is continued across chunk borders (the last sample of each chunk is carried over).
+    """
+    time_previous = None
+    ff_previous = None
+    fuel_previous = 0.0
+    for time, ff in chunks:
+        if time.size == 0:
+            continue
+        if time_previous is None:
+            time_extended, ff_extended = time, ff
+        else:
+            time_extended = np.concatenate([[time_previous], time])
+            ff_extended = np.concatenate([[ff_previous], ff])
+        increments = np.diff(time_extended) * (ff_extended[1:] + ff_extended[:-1]) / 2
+        if time_previous is None:
+            increments = np.concatenate([[0.0], increments])
+        fuel = fuel_previous + np.cumsum(increments)
+        time_previous, ff_previous, fuel_previous = time[-1], ff[-1], fuel[-1]
+        yield time, ff, fuel
+
+
+def find_flight_phases(
+    make_chunks,
+    ground_fraction: float = 0.25,
+    cruise_tolerance: float = 0.05,
+    n_bins: int = 200,
+    time_unit_seconds: float = 3600,
+) -> dict[str, dict[str, float]]:
+    """
+    Finds the phase boundaries of a fuel flow trace and integrates the fuel burnt per phase.
+    `make_chunks` is called once per pass and must return an iterable of (time, ff) arrays,
+    e.g. `lambda: read_fuel_flow_chunks(path)` or `lambda: [(time, ff)]`.
+
+    Phases are found from the fuel flow levels alone, in three streaming passes:
+    1. peak fuel flow; it is not a boundary itself, but separates climb (before) from cruise (after)
+    2. ground threshold (ff >= ground_fraction * peak): its first crossing ends the take-off phase
+       ('takeoff end', start of climb), its last crossing starts the landing phase ('landing start', end of descent);
+       the cruise fuel flow is the most frequent (time-weighted) level above the threshold after the peak
+    3. cruise starts when ff first drops to within `cruise_tolerance` of the cruise level after the peak,
+       and ends when ff last exceeds the lower tolerance band before landing.
+       The cumulative trapezoid sum is evaluated at all boundaries in the same pass.
+
+    The phases are: takeoff (start to 'takeoff end'), climb ('takeoff end' to 'cruise start'),
+    cruise ('cruise start' to 'cruise end'), descent ('cruise end' to 'landing start') and landing ('landing start' to end).
+
+    Returns the boundary times [same unit as 'time'] and fuel burnt [kg] per phase
+    ('takeoff', 'climb', 'cruise', 'descent', 'landing').
+    """
+    # pass 1
+    ff_max = -np.inf
+    time_peak = np.nan
+    for time, ff in make_chunks():
+        if ff.size > 0 and ff.max() > ff_max:
+            ff_max = ff.max()
+            time_peak = time[np.argmax(ff)]
+    if not np.isfinite(ff_max):
+        raise ValueError("Fuel flow trace is empty")
+
+    # pass 2
+    ff_ground = ground_fraction * ff_max
+    time_start = np.nan
+    time_takeoff_end = np.nan
+    time_landing_start = np.nan
+    bins = np.linspace(0, ff_max, n_bins + 1)
+    histogram = np.zeros(n_bins)
+    time_previous = None
+    for time, ff in make_chunks():
+        if ff.size == 0:
+            continue
+        if np.isnan(time_start):
+            time_start = time[0]
+        airborne = np.flatnonzero(ff >= ff_ground)
+        if airborne.size > 0:
+            if np.isnan(time_takeoff_end):
+                time_takeoff_end = time[airborne[0]]
+            time_landing_start = time[airborne[-1]]
+        duration = np.diff(time, prepend = time[0] if time_previous is None else time_previous)
+        after_peak = (time > time_peak) & (ff >= ff_ground)
+        histogram += np.histogram(ff[after_peak], bins = bins, weights = duration[after_peak])[0]
+        time_previous = time[-1]
+    ff_cruise = (bins[np.argmax(histogram)] + bins[np.argmax(histogram) + 1]) / 2
+
+    # pass 3
+    boundaries = {
+        'start': time_start,
+        'takeoff end': time_takeoff_end,
+        'cruise start': np.nan,
+        'cruise end': np.nan,
+        'landing start': time_landing_start,
+        'end': np.nan,
+    }
+    fuel_at = dict.fromkeys(boundaries.keys(), np.nan)
+    fuel_at['start'] = 0.0
+    for time, ff, fuel in cumulative_trapezoid_chunks(make_chunks()):
+        for key in ['takeoff end', 'landing start']:
+            match = np.flatnonzero(time == boundaries[key])
+            if match.size > 0:
+                fuel_at[key] = fuel[match[0]]
+        if np.isnan(boundaries['cruise start']):
+            candidates = np.flatnonzero((time > time_peak) & (ff <= ff_cruise * (1 + cruise_tolerance)))
+            if candidates.size > 0:
+                boundaries['cruise start'] = time[candidates[0]]
+                fuel_at['cruise start'] = fuel[candidates[0]]
+        candidates = np.flatnonzero(
+            (time > time_peak) & (time <= time_landing_start) & (ff >= ff_cruise * (1 - cruise_tolerance))
+        )
+        if candidates.size > 0:
+            boundaries['cruise end'] = time[candidates[-1]]
+            fuel_at['cruise end'] = fuel[candidates[-1]]
+        boundaries['end'] = time[-1]
+        fuel_at['end'] = fuel[-1]
+
+    keys = list(boundaries.keys())
+    phases = ['takeoff', 'climb', 'cruise', 'descent', 'landing']
+    fuel = {
+        phase: (fuel_at[keys[i + 1]] - fuel_at[keys[i]]) * time_unit_seconds
+        for i, phase in enumerate(phases)
+    }
+    return {
+        'boundaries': boundaries,
+        'fuel': fuel,
+        'ff_cruise': ff_cruise,
+    }
+
+
+def process_fuel_flow_logs(
+    list_paths: list[str],
+    chunk_size: int = 1_000_000,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Runs `find_flight_phases` on the fuel flow logs of many flights.
+    Returns one row per flight with the boundary times and the fuel burnt [kg] per phase.
+    """
+    list_rows = []
+    for path in list_paths:
+        result = find_flight_phases(
+            make_chunks = lambda: read_fuel_flow_chunks(path, chunk_size),
+            **kwargs,
+        )
+        row = {'path': path}
+        row.update({f'{key} [h]': value for key, value in result['boundaries'].items()})
+        row.update({f'{key} fuel [kg]': value for key, value in result['fuel'].items()})
+        list_rows.append(row)
+    return pd.DataFrame(list_rows)
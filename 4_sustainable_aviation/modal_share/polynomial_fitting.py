@@ -0,0 +1,162 @@
+#%%
+# least-squares polynomial fits of modal share curves, all columns sharing a distance grid in one solve
+# replaces the per-column `Polynomial.fit` calls of `interpolate_japan` and `interpolate_usa` in modal_share.py
+# compare: numpy_interpolation.py
+
+# IMPORTS #######################################
+
+# data science
+import numpy as np
+import pandas as pd
+
+# FUNCTIONS #####################################
+
+def build_vandermonde(
+    x: np.ndarray,
+    deg: int,
+) -> np.ndarray:
+    """
+    Vandermonde matrix (..., point, power) of `x` (..., point), after mapping each grid
+    from [min, max] to [-1, 1] as `Polynomial.fit` does (keeps the matrix well conditioned).
+    """
+    x = np.asarray(x, dtype=float)
+    x_min = np.min(x, axis=-1, keepdims=True)
+    x_max = np.max(x, axis=-1, keepdims=True)
+    return np.polynomial.polynomial.polyvander(map_to_window(x, x_min, x_max), deg)
+
+
+def map_to_window(
+    x: np.ndarray,
+    x_min: np.ndarray,
+    x_max: np.ndarray,
+) -> np.ndarray:
+    return (2 * x - (x_min + x_max)) / np.where(x_max > x_min, x_max - x_min, 1)
+
+
+def fit_polynomials(
+    x: np.ndarray,
+    Y: np.ndarray,
+    new_x: list[float] | np.ndarray,
+    deg: int = 5,
+) -> np.ndarray:
+    """
+    Fits a polynomial of degree `deg` to every column of `Y` and evaluates all of them on `new_x`.
+
+    x: (point,) distance grid shared by all columns of Y (point, column), or
+    x: (grid, point) with Y (grid, point, column) for many grids of the same length at once
+    (e.g. one per country/year).
+
+    Equivalent to `Polynomial.fit(x, Y[:, j], deg)(new_x)` for each column j,
+    but with one Vandermonde matrix and one least-squares solve per grid (a single stacked
+    pseudo-inverse for several grids) and a vectorized evaluation on the full `new_x` grid.
+    Returns (new_x, column), or (grid, new_x, column).
+    """
+    x = np.asarray(x, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    if x.shape != Y.shape[:-1]:
+        raise ValueError(f"x of shape {x.shape} does not match Y of shape {Y.shape}")
+    if np.isnan(x).any() or np.isnan(Y).any():
+        raise ValueError("x and Y must not contain NaN; fit columns with missing values on their own grid")
+    if x.shape[-1] <= deg:
+        raise ValueError(f"at least {deg + 1} points are needed for a polynomial of degree {deg}")
+
+    V = build_vandermonde(x, deg)
+    if V.ndim == 2:
+        coefficients = np.linalg.lstsq(V, Y, rcond=None)[0]
+    else:
+        coefficients = np.linalg.pinv(V) @ Y
+
+    new_x = np.asarray(new_x, dtype=float)
+    x_min = np.min(x, axis=-1, keepdims=True)
+    x_max = np.max(x, axis=-1, keepdims=True)
+    V_new = np.polynomial.polynomial.polyvander(map_to_window(new_x, x_min, x_max), deg)
+    return V_new @ coefficients
+
+
+def enforce_total_share(
+    shares: np.ndarray,
+    total: float = 100,
+) -> np.ndarray:
+    """
+    Clips negative shares (polynomial overshoot) to zero and rescales the shares along the last axis
+    to sum to `total` [%]. Rows that are zero everywhere are left at zero.
+    """
+    shares = np.clip(shares, 0, None)
+    row_sum = np.sum(shares, axis=-1, keepdims=True)
+    return np.where(row_sum > 0, shares / np.where(row_sum > 0, row_sum, 1) * total, 0)
+
+
+def fit_modal_share(
+    df: pd.DataFrame,
+    grids: dict[str, list[str]],
+    new_x: list[float],
+    deg: int = 5,
+    total_share: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Fits the share columns of `df` on their distance grids, with `grids` = {x column: [y columns]}, e.g.
+
+        fit_modal_share(df_japan, {'distance mean [km]': ['rail [%]', 'car [%]', 'air [%]', 'other [%]']}, unified_distance)
+        fit_modal_share(df_usa, {'distance (air) [miles]': ['air [%]'], 'distance (car) [miles]': ['car [%]']}, unified_distance)
+
+    reproduce `interpolate_japan` and `interpolate_usa` of modal_share.py.
+    Rows with a missing x value or share are dropped per grid.
+    If `total_share` lists columns, these are clipped to >= 0 and rescaled to sum to 100 %.
+    Returns a DataFrame with a 'distance [km]' column and one column per fitted share.
+    """
+    df_fitted = pd.DataFrame()
+    df_fitted['distance [km]'] = new_x
+    for x_column, y_columns in grids.items():
+        df_grid = df[[x_column] + y_columns].dropna()
+        fitted = fit_polynomials(
+            x = df_grid[x_column].to_numpy(),
+            Y = df_grid[y_columns].to_numpy(),
+            new_x = new_x,
+            deg = deg,
+        )
+        for j, y_column in enumerate(y_columns):
+            df_fitted[y_column] = fitted[:, j]
+    if total_share:
+        df_fitted[total_share] = enforce_total_share(df_fitted[total_share].to_numpy())
+    return df_fitted
+
+
+def fit_modal_share_groups(
+    df: pd.DataFrame,
+    x_column: str,
+    y_columns: list[str],
+    group_columns: list[str],
+    new_x: list[float],
+    deg: int = 5,
+    normalize: bool = True,
+) -> pd.DataFrame:
+    """
+    Fits the share columns of every group (e.g. group_columns = ['country', 'year']) of a long table at once.
+    Groups with the same number of data points are stacked and solved together by `fit_polynomials`.
+    If `normalize`, the fitted shares of each distance sum to 100 %.
+    Returns a long DataFrame with the group columns, 'distance [km]' and the fitted shares.
+    """
+    df = df.dropna(subset = [x_column] + y_columns)
+    dict_groups = {key: df_group for key, df_group in df.groupby(group_columns, sort=False)}
+    dict_by_length = {}
+    for key, df_group in dict_groups.items():
+        dict_by_length.setdefault(len(df_group), []).append(key)
+
+    list_df_fitted = []
+    for keys in dict_by_length.values():
+        x = np.stack([dict_groups[key][x_column].to_numpy(dtype=float) for key in keys])
+        Y = np.stack([dict_groups[key][y_columns].to_numpy(dtype=float) for key in keys])
+        fitted = fit_polynomials(x, Y, new_x, deg)
+        if normalize:
+            fitted = enforce_total_share(fitted)
+        df_fitted = pd.DataFrame(
+            data = fitted.reshape(-1, len(y_columns)),
+            columns = y_columns,
+        )
+        df_fitted.insert(0, 'distance [km]', np.tile(new_x, len(keys)))
+        df_keys = pd.DataFrame(
+            data = np.repeat(np.array(keys, dtype=object).reshape(len(keys), -1), len(new_x), axis=0),
+            columns = group_columns,
+        )
+        list_df_fitted.append(pd.concat([df_keys, df_fitted], axis=1))
+    return pd.concat(list_df_fitted, ignore_index=True)
@@ -0,0 +1,95 @@
+#%%
+# dense scenario x measure x year cube of stacked abatement wedges
+# replaces the per-DataFrame .copy() and subtraction chains of net_zero_scenario_all.py
+
+# IMPORTS #######################################
+
+# data science
+import numpy as np
+import pandas as pd
+# scenarios
+from scenario_resampling import resample_scenario_sheet
+
+# DATA ##########################################
+
+# digitized curves of each scenario, from bottom (net emissions) to top (reference) of the wedge stack
+# each curve is the upper edge of its wedge, i.e. the values are cumulative ("stacked")
+dict_stack_order: dict[str, list[str]] = {
+    'Destination2050': ['Net_CO2_emissions', 'effect_SAF', 'SAF', 'effect_hydrogen', 'hypothetical_reference'],
+    'Eurocontrol': ['best_case', 'Other', 'SAF', 'ATM', 'Fleet_revol', 'Fleet_evol'],
+    'Swiss': ['reduced', 'offset', 'saf', 'efficiency', 'ops', 'econ'],
+    'WayPoint2050': ['reduced', 'MarketBased_Measure', 'SAF', 'Operations_and_Infrastructure', 'Technology'],
+    'CORSIA': ['baseline', 'corsia', 'tech', 'net'],
+}
+
+# FUNCTIONS #####################################
+
+def build_scenario_cube(
+    dict_sheets: dict[str, pd.DataFrame],
+    new_x_values: list[int],
+    stack_order: dict[str, list[str]] = dict_stack_order,
+) -> dict[str, np.ndarray]:
+    """
+    Resamples all scenario sheets (as loaded in net_zero_scenario_all.py) to `new_x_values`
+    and stacks them into one array 'stacked' of shape (scenario, level, year).
+    Level k is the k-th curve from the bottom of each scenario's stack;
+    scenarios with fewer curves are padded at the top with their last (reference) curve,
+    i.e. with wedges of zero height.
+    'measures' (scenario, level) holds the curve names ('' for padding).
+    """
+    scenarios = list(dict_sheets.keys())
+    n_levels = max(len(stack_order[scenario]) for scenario in scenarios)
+    stacked = np.empty((len(scenarios), n_levels, len(new_x_values)))
+    measures = np.full((len(scenarios), n_levels), '', dtype=object)
+    for i, scenario in enumerate(scenarios):
+        order = stack_order[scenario]
+        df_resampled = resample_scenario_sheet(dict_sheets[scenario], new_x_values)
+        stacked[i, :len(order)] = df_resampled[order].to_numpy().T
+        stacked[i, len(order):] = stacked[i, len(order) - 1]
+        measures[i, :len(order)] = order
+    return {
+        'scenarios': np.array(scenarios),
+        'measures': measures,
+        'years': np.asarray(new_x_values),
+        'stacked': stacked,
+    }
+
+
+def stacked_to_absolute(
+    stacked: np.ndarray,
+) -> np.ndarray:
+    """
+    Wedge heights from stacked curves: level 0 is kept (net emissions), every other level
+    is the difference to the curve below it.
+    """
+    return np.diff(stacked, axis=1, prepend=0)
+
+
+def absolute_to_stacked(
+    absolute: np.ndarray,
+) -> np.ndarray:
+    return np.cumsum(absolute, axis=1)
+
+
+def reorder_wedges(
+    stacked: np.ndarray,
+    new_order: list[int] | np.ndarray,
+) -> np.ndarray:
+    """
+    Restacks the wedges in `new_order` (level indices, bottom to top; per scenario if 2-D).
+    E.g. for the Swiss scenario, new_order = [0, 1, 5, 2, 4, 3] moves 'econ' directly above 'offset',
+    as for the df_Swiss_*_new frames of net_zero_scenario_all.py.
+    """
+    absolute = stacked_to_absolute(stacked)
+    new_order = np.broadcast_to(np.asarray(new_order), stacked.shape[:2])
+    return absolute_to_stacked(np.take_along_axis(absolute, new_order[:, :, None], axis=1))
+
+
+def normalize_to_reference(
+    stacked: np.ndarray,
+) -> np.ndarray:
+    """
+    Share of each stacked curve in the top (reference) curve of its scenario [%],
+    as `normalize_dataframe_and_select_years` in net_zero_scenario_all.py, for all scenarios at once.
+    """
+    return stacked / stacked[:, -1:, :] * 100
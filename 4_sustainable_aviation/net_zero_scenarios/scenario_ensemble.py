@@ -0,0 +1,165 @@
+#%%
+# ensemble of 2020-2050 aviation CO2 pathways from ranges of traffic growth, efficiency gains, SAF share and offsets
+# pathways are generated in chunks across a process pool and reduced to percentile fan bands via per-year histograms,
+# so memory does not depend on the number of sampled pathways
+
+# IMPORTS #######################################
+
+# sys
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+# data science
+import numpy as np
+import pandas as pd
+
+# DATA ##########################################
+
+list_of_years: list[int] = [i for i in range(2020, 2050+1)]
+
+# (min, max) of the uniformly sampled parameters
+dict_ranges_default: dict[str, tuple[float, float]] = {
+    'traffic_growth': (0.02, 0.04), # per year
+    'efficiency_gain': (0.01, 0.02), # per year, fuel per RPK
+    'saf_share_2050': (0.3, 0.7), # of fuel, linear ramp from 0 in 2020
+    'saf_reduction': (0.6, 0.9), # life-cycle CO2 reduction of SAF vs. kerosene
+    'offset_share_2050': (0.0, 0.3), # of remaining emissions, linear ramp from 0 in 2020
+}
+
+# FUNCTIONS #####################################
+
+def calculate_pathways(
+    parameters: dict[str, np.ndarray],
+    emissions_2020: float = 1.0,
+    years: list[int] = list_of_years,
+) -> np.ndarray:
+    """
+    Returns net CO2 emissions (pathway, year) relative to `emissions_2020`:
+
+        E(t) = E_2020 * ((1+g)(1-e))^(t-2020) * (1 - s(t) * r) * (1 - o(t))
+
+    with traffic growth g, efficiency gain e, SAF share s(t) and its CO2 reduction r,
+    and offset share o(t). s(t) and o(t) ramp linearly from 0 in 2020 to their 2050 value.
+    """
+    t = np.asarray(years, dtype=float)[None, :] - years[0]
+    ramp = t / (years[-1] - years[0])
+    p = {key: np.asarray(value, dtype=float)[:, None] for key, value in parameters.items()}
+    growth = np.power((1 + p['traffic_growth']) * (1 - p['efficiency_gain']), t)
+    saf = 1 - p['saf_share_2050'] * ramp * p['saf_reduction']
+    offsets = 1 - p['offset_share_2050'] * ramp
+    return emissions_2020 * growth * saf * offsets
+
+
+def calculate_pathway_bounds(
+    ranges: dict[str, tuple[float, float]],
+    emissions_2020: float = 1.0,
+    years: list[int] = list_of_years,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Lowest and highest possible emissions per year. E(t) is monotonic in every parameter,
+    so the extremes are the pathways at the corners of the parameter ranges.
+    """
+    highest = {
+        'traffic_growth': [ranges['traffic_growth'][1]],
+        'efficiency_gain': [ranges['efficiency_gain'][0]],
+        'saf_share_2050': [ranges['saf_share_2050'][0]],
+        'saf_reduction': [ranges['saf_reduction'][0]],
+        'offset_share_2050': [ranges['offset_share_2050'][0]],
+    }
+    lowest = {
+        'traffic_growth': [ranges['traffic_growth'][0]],
+        'efficiency_gain': [ranges['efficiency_gain'][1]],
+        'saf_share_2050': [ranges['saf_share_2050'][1]],
+        'saf_reduction': [ranges['saf_reduction'][1]],
+        'offset_share_2050': [ranges['offset_share_2050'][1]],
+    }
+    return (
+        calculate_pathways(lowest, emissions_2020, years)[0],
+        calculate_pathways(highest, emissions_2020, years)[0],
+    )
+
+
+def histogram_chunk(
+    seed: np.random.SeedSequence,
+    n_pathways: int,
+    ranges: dict[str, tuple[float, float]],
+    bin_edges: np.ndarray,
+    emissions_2020: float,
+    years: list[int],
+) -> np.ndarray:
+    """
+    Samples and computes `n_pathways` pathways and returns their histogram counts (year, bin).
+    Runs in the worker processes; only the counts are sent back.
+    """
+    rng = np.random.default_rng(seed)
+    parameters = {key: rng.uniform(low, high, n_pathways) for key, (low, high) in ranges.items()}
+    pathways = calculate_pathways(parameters, emissions_2020, years)
+    n_bins = bin_edges.shape[1] - 1
+    bin_width = bin_edges[:, 1] - bin_edges[:, 0]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        index = np.floor((pathways - bin_edges[None, :, 0]) / bin_width[None, :])
+    index = np.clip(np.nan_to_num(index), 0, n_bins - 1).astype(int)
+    # one bincount over (year, bin) pairs instead of one histogram per year
+    flat_index = index + np.arange(len(years))[None, :] * n_bins
+    return np.bincount(flat_index.ravel(), minlength = len(years) * n_bins).reshape(len(years), n_bins)
+
+
+def generate_pathway_ensemble(
+    n_pathways: int = 1_000_000,
+    ranges: dict[str, tuple[float, float]] = dict_ranges_default,
+    percentiles: tuple[float, ...] = (5, 25, 50, 75, 95),
+    emissions_2020: float = 1.0,
+    years: list[int] = list_of_years,
+    chunk_size: int = 100_000,
+    n_bins: int = 10_000,
+    max_workers: int | None = None,
+    seed: int | None = None,
+) -> pd.DataFrame:
+    """
+    Generates `n_pathways` pathways in chunks of `chunk_size` across a process pool
+    and reduces them to percentile fan bands per year.
+
+    Each chunk is reduced to histogram counts on fixed bins between the lowest and highest possible
+    emissions of each year, and the counts are summed as chunks complete. Percentiles are read
+    from the cumulative counts with linear interpolation inside the bin, so their error is below
+    one bin width, i.e. (highest - lowest) / `n_bins`.
+    Memory use is bounded by chunk_size x years per worker plus years x n_bins, for any `n_pathways`.
+
+    Note: on platforms that spawn worker processes (Windows, macOS), call this from within
+    an `if __name__ == '__main__':` block.
+
+    Returns a DataFrame with a 'year' column and one column per percentile.
+    """
+    lowest, highest = calculate_pathway_bounds(ranges, emissions_2020, years)
+    highest = np.maximum(highest, lowest + 1e-12) # first year: all pathways are equal
+    bin_edges = np.linspace(lowest, highest, n_bins + 1, axis=1)
+
+    chunk_sizes = [min(chunk_size, n_pathways - start) for start in range(0, n_pathways, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    counts = np.zeros((len(years), n_bins), dtype=np.int64)
+    max_workers = max_workers or os.cpu_count()
+    chunks = iter(zip(seeds, chunk_sizes))
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+        # at most two chunks per worker in flight, so pending results do not pile up
+        pending = set()
+        for chunk_seed, size in itertools.islice(chunks, 2 * max_workers):
+            pending.add(executor.submit(histogram_chunk, chunk_seed, size, ranges, bin_edges, emissions_2020, years))
+        while pending:
+            done, pending = wait(pending, return_when = FIRST_COMPLETED)
+            for future in done:
+                counts += future.result()
+            for chunk_seed, size in itertools.islice(chunks, len(done)):
+                pending.add(executor.submit(histogram_chunk, chunk_seed, size, ranges, bin_edges, emissions_2020, years))
+
+    cumulative = np.cumsum(counts, axis=1) / n_pathways * 100 # [%] of pathways below the upper bin edge
+    df_percentiles = pd.DataFrame({'year': years})
+    for percentile in percentiles:
+        # first bin whose cumulative share reaches the percentile, interpolated within that bin
+        index = np.argmax(cumulative >= percentile, axis=1)
+        below = np.where(index > 0, np.take_along_axis(cumulative, np.maximum(index - 1, 0)[:, None], axis=1)[:, 0], 0)
+        inside = np.take_along_axis(cumulative, index[:, None], axis=1)[:, 0] - below
+        fraction = np.where(inside > 0, (percentile - below) / np.where(inside > 0, inside, 1), 0)
+        edges_lower = np.take_along_axis(bin_edges, index[:, None], axis=1)[:, 0]
+        edges_upper = np.take_along_axis(bin_edges, index[:, None] + 1, axis=1)[:, 0]
+        df_percentiles[percentile] = edges_lower + fraction * (edges_upper - edges_lower)
+    return df_percentiles
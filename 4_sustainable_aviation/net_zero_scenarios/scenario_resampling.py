@@ -0,0 +1,86 @@
+#%%
+# resampling of all digitized (x)/(y) column pairs of a scenario sheet to common years in one pass
+# replaces the per-pair `interpolate_1d_dataframe` calls of net_zero_scenario_all.py
+
+# IMPORTS #######################################
+
+# data science
+import numpy as np
+import pandas as pd
+
+# FUNCTIONS #####################################
+
+def find_column_pairs(
+    df: pd.DataFrame,
+) -> dict[str, tuple[str, str]]:
+    """
+    Returns {name: (name (x), name (y))} for all columns 'name (x)' with a matching 'name (y)',
+    in the order of the sheet.
+    """
+    return {
+        column[:-len(' (x)')]: (column, column[:-len(' (x)')] + ' (y)')
+        for column in df.columns
+        if column.endswith(' (x)') and column[:-len(' (x)')] + ' (y)' in df.columns
+    }
+
+
+def interpolate_batched(
+    x: np.ndarray,
+    y: np.ndarray,
+    new_x: np.ndarray,
+) -> np.ndarray:
+    """
+    Linear interpolation of many curves at once.
+    `x` and `y` are (curve, point) arrays, sorted by x along each row and padded with NaN at the end.
+    Returns a (curve, new_x) array; values outside of the range of a curve are NaN
+    (like `interp1d`, which raises an error there).
+    """
+    new_x = np.asarray(new_x, dtype=float)
+    n_points = np.sum(~np.isnan(x), axis=1)
+    # index of the segment containing each new x value: number of points <= new x, minus one
+    with np.errstate(invalid='ignore'):
+        segment = np.sum(x[:, :, None] <= new_x[None, None, :], axis=1) - 1
+    segment = np.clip(segment, 0, np.maximum(n_points - 2, 0)[:, None])
+
+    x_start = np.take_along_axis(x, segment, axis=1)
+    x_end = np.take_along_axis(x, segment + 1, axis=1)
+    y_start = np.take_along_axis(y, segment, axis=1)
+    y_end = np.take_along_axis(y, segment + 1, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = (new_x[None, :] - x_start) / (x_end - x_start)
+    fraction = np.where(x_end == x_start, 0, fraction) # repeated x values
+    y_new = y_start + fraction * (y_end - y_start)
+
+    x_min = x[:, 0][:, None]
+    x_max = np.take_along_axis(x, np.maximum(n_points - 1, 0)[:, None], axis=1)
+    outside = (new_x[None, :] < x_min) | (new_x[None, :] > x_max) | (n_points[:, None] < 2)
+    return np.where(outside, np.nan, y_new)
+
+
+def resample_scenario_sheet(
+    df: pd.DataFrame,
+    new_x_values: list[int],
+) -> pd.DataFrame:
+    """
+    Resamples all (x)/(y) column pairs of a scenario sheet to `new_x_values` (years).
+    Returns one DataFrame with a 'year' column and one column per pair name, e.g.
+    resample_scenario_sheet(df_Swiss, list_of_years)['saf'] equals
+    interpolate_1d_dataframe(df_Swiss, 'saf (x)', 'saf (y)', list_of_years)['y'].
+    """
+    pairs = find_column_pairs(df)
+    x = df[[pair[0] for pair in pairs.values()]].to_numpy(dtype=float).T
+    y = df[[pair[1] for pair in pairs.values()]].to_numpy(dtype=float).T
+
+    # rows with a missing x or y value are dropped per curve and moved to the end (NaN padding)
+    invalid = np.isnan(x) | np.isnan(y)
+    x = np.where(invalid, np.nan, x)
+    order = np.argsort(np.where(invalid, np.inf, x), axis=1, kind='stable')
+    x = np.take_along_axis(x, order, axis=1)
+    y = np.take_along_axis(np.where(invalid, np.nan, y), order, axis=1)
+
+    df_resampled = pd.DataFrame(
+        data = interpolate_batched(x, y, new_x_values).T,
+        columns = list(pairs.keys()),
+    )
+    df_resampled.insert(0, 'year', new_x_values)
+    return df_resampled
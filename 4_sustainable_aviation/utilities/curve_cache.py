@@ -0,0 +1,251 @@
+#%%
+# on-disk memoization of interpolants and fitted curves, keyed on a hash of the input data and fit parameters
+# repeated figure builds load the fitted coefficients and resampled arrays instead of fitting again
+#
+# usage from a figure script (scripts are run from their own directory):
+#   import sys; sys.path.append('../utilities')
+#   from curve_cache import cached_interp
+#   df['Total [Gl]'] = cached_interp(x = years_complete, xp = df_fuel['Year'], fp = df_fuel['Total [Gl]'])
+
+# IMPORTS #######################################
+
+# sys
+import os
+import hashlib
+import inspect
+import functools
+# i/o
+from pathlib import Path
+# data science
+import numpy as np
+import pandas as pd
+import scipy as sp
+
+# DATA ##########################################
+
+path_cache_default: Path = Path.home() / '.cache' / 'phd_publication_figures' / 'curves'
+max_entries_default: int = 1024
+max_bytes_default: int = 256 * 1024**2
+
+# FUNCTIONS #####################################
+
+def update_digest(
+    digest,
+    value,
+) -> bool:
+    """
+    Adds a value to a hash: numeric arrays (and lists of numbers) by dtype, shape and content,
+    pandas objects by `pd.util.hash_pandas_object` (values and index) plus dtypes and column names,
+    other lists, tuples and dicts element-wise, scalars by their repr.
+    Returns False if the value can not be hashed exactly, i.e. its repr is abbreviated ('...') or
+    contains a memory address (' at 0x'), or its pandas values are unhashable.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        try:
+            hashes = pd.util.hash_pandas_object(value, index=not isinstance(value, pd.Index))
+        except TypeError: # e.g. lists as values
+            return False
+        dtypes = value.dtypes.tolist() if isinstance(value, pd.DataFrame) else [value.dtype]
+        columns = value.columns.tolist() if isinstance(value, pd.DataFrame) else [value.name]
+        digest.update(f'{type(value).__name__}{value.shape}{dtypes!r}'.encode())
+        digest.update(hashes.to_numpy().tobytes())
+        return update_digest(digest, columns)
+    if isinstance(value, (np.ndarray, list, tuple)):
+        try:
+            array = np.ascontiguousarray(np.asarray(value))
+        except ValueError: # ragged nested lists
+            array = None
+        if array is not None and array.dtype.kind in 'biufcmM':
+            digest.update(f'{type(value).__name__}{array.dtype.str}{array.shape}'.encode())
+            digest.update(array.tobytes())
+            return True
+        items = value.tolist() if isinstance(value, np.ndarray) else value
+        digest.update(f'{type(value).__name__}{len(items)}'.encode())
+        return all(update_digest(digest, item) for item in items)
+    if isinstance(value, dict):
+        digest.update(f'dict{len(value)}'.encode())
+        return all(update_digest(digest, key) and update_digest(digest, item) for key, item in value.items())
+    description = repr(value)
+    if not isinstance(value, (str, bytes, int, float, bool, type(None), np.generic)):
+        if ' at 0x' in description or '...' in description:
+            return False
+    digest.update(f'{type(value).__name__}:{description}'.encode())
+    return True
+
+
+def hash_inputs(
+    name: str,
+    args: tuple,
+    kwargs: dict,
+) -> str | None:
+    """
+    SHA-256 of a function name and its arguments (see `update_digest`),
+    or None if an argument can not be hashed exactly.
+    """
+    digest = hashlib.sha256(name.encode())
+    items = list(enumerate(args)) + sorted(kwargs.items())
+    for key, value in items:
+        digest.update(repr(key).encode())
+        if not update_digest(digest, value):
+            return None
+    return digest.hexdigest()
+
+
+def evict_least_recently_used(
+    path_cache: Path,
+    max_entries: int = max_entries_default,
+    max_bytes: int = max_bytes_default,
+) -> None:
+    """
+    Deletes cache files, least recently used (oldest modification time) first,
+    until at most `max_entries` files and `max_bytes` remain.
+    Files being written (*.tmp, see `memoize_curve`) are not cache entries and are left alone.
+    """
+    list_entries = sorted(
+        ((entry.stat().st_mtime, entry.stat().st_size, entry) for entry in path_cache.glob('*.npz')),
+        key = lambda entry: entry[0],
+    )
+    total_bytes = sum(size for _, size, _ in list_entries)
+    n_entries = len(list_entries)
+    for _, size, entry in list_entries:
+        if n_entries <= max_entries and total_bytes <= max_bytes:
+            break
+        entry.unlink(missing_ok=True)
+        n_entries -= 1
+        total_bytes -= size
+
+
+def memoize_curve(
+    function = None,
+    path_cache: Path = path_cache_default,
+    max_entries: int = max_entries_default,
+    max_bytes: int = max_bytes_default,
+):
+    """
+    Decorator caching the result of `function` on disk, keyed on `hash_inputs` of its arguments
+    (calls with arguments that can not be hashed exactly are not cached),
+    bound to its signature with defaults applied (so that `f(x, y, nx)` and `f(x, y, nx, kind = 'linear')` share an entry).
+    The function must return an array or a dict of arrays (e.g. fit coefficients and resampled values).
+    A cache hit refreshes the file's modification time, which `evict_least_recently_used` uses as LRU order.
+    The cache directory can be overridden with the PHD_FIGURES_CACHE environment variable
+    (entries are kept in its 'curves' subdirectory); setting it to an empty string disables caching.
+    """
+    if function is None:
+        return functools.partial(memoize_curve, path_cache=path_cache, max_entries=max_entries, max_bytes=max_bytes)
+    signature = inspect.signature(function)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if os.environ.get('PHD_FIGURES_CACHE') == '':
+            return function(*args, **kwargs)
+        directory = Path(os.environ['PHD_FIGURES_CACHE']) / 'curves' if 'PHD_FIGURES_CACHE' in os.environ else path_cache
+        arguments = signature.bind(*args, **kwargs)
+        arguments.apply_defaults()
+        digest = hash_inputs(function.__qualname__, (), dict(arguments.arguments))
+        if digest is None: # argument without exact hash: not cached
+            return function(*args, **kwargs)
+        path_entry = directory / f'{function.__module__}.{function.__qualname__}-{digest}.npz'
+        if path_entry.exists():
+            try:
+                with np.load(path_entry, allow_pickle=False) as npz:
+                    result = {key: npz[key] for key in npz.files}
+                os.utime(path_entry)
+                return result['__array__'] if list(result) == ['__array__'] else result
+            except (OSError, ValueError):
+                path_entry.unlink(missing_ok=True) # unreadable (e.g. partially written): recompute
+
+        result = function(*args, **kwargs)
+        directory.mkdir(parents=True, exist_ok=True)
+        # not ending in .npz, so that `evict_least_recently_used` of a concurrent build does not delete it
+        path_temporary = path_entry.with_name(f'{path_entry.stem}.{os.getpid()}.tmp')
+        with open(path_temporary, 'wb') as file:
+            if isinstance(result, dict):
+                np.savez(file, **result)
+            else:
+                np.savez(file, __array__=np.asarray(result))
+        os.replace(path_temporary, path_entry) # atomic, so concurrent builds never read half a file
+        evict_least_recently_used(directory, max_entries, max_bytes)
+        return result
+
+    return wrapper
+
+
+@memoize_curve
+def cached_interp(
+    x: np.ndarray,
+    xp: np.ndarray,
+    fp: np.ndarray,
+) -> np.ndarray:
+    """
+    Cached `np.interp(x, xp, fp)`, as in historical_fuel_use.py.
+    """
+    return np.interp(
+        x = np.asarray(x, dtype=float),
+        xp = np.asarray(xp, dtype=float),
+        fp = np.asarray(fp, dtype=float),
+    )
+
+
+@memoize_curve
+def cached_interp1d(
+    x: np.ndarray,
+    y: np.ndarray,
+    new_x: np.ndarray,
+    kind: str = 'linear',
+) -> np.ndarray:
+    """
+    Cached `interp1d(x, y, kind)(new_x)`, as in `interpolate_1d_dataframe` of the net-zero scripts.
+    NaN values in x and y are dropped first. Like interp1d, raises a ValueError outside of the range of x.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    return sp.interpolate.interp1d(
+        x = x[~np.isnan(x)],
+        y = y[~np.isnan(y)],
+        kind = kind,
+    )(np.asarray(new_x, dtype=float))
+
+
+@memoize_curve
+def cached_interp_spline(
+    x: np.ndarray,
+    y: np.ndarray,
+    x_new: np.ndarray,
+    k: int = 3,
+) -> dict[str, np.ndarray]:
+    """
+    Cached `make_interp_spline(x, y, k)(x_new)`, as in 1936_wright.py.
+    Returns {'t': knots, 'c': coefficients, 'k': degree, 'y_new': values at x_new};
+    `sp.interpolate.BSpline(t, c, int(k))` rebuilds the spline.
+    """
+    spline = sp.interpolate.make_interp_spline(np.asarray(x, dtype=float), np.asarray(y, dtype=float), k = k)
+    return {
+        't': spline.t,
+        'c': spline.c,
+        'k': np.array(spline.k),
+        'y_new': spline(np.asarray(x_new, dtype=float)),
+    }
+
+
+@memoize_curve
+def cached_polynomial_fit(
+    x: np.ndarray,
+    y: np.ndarray,
+    new_x: np.ndarray,
+    deg: int,
+) -> dict[str, np.ndarray]:
+    """
+    Cached `Polynomial.fit(x, y, deg)(new_x)`, as in modal_share.py.
+    Returns {'coef': coefficients, 'domain': domain, 'y_new': values at new_x};
+    `Polynomial(coef, domain)` rebuilds the polynomial.
+    """
+    polynomial = np.polynomial.polynomial.Polynomial.fit(
+        x = np.asarray(x, dtype=float),
+        y = np.asarray(y, dtype=float),
+        deg = deg,
+    )
+    return {
+        'coef': polynomial.coef,
+        'domain': polynomial.domain,
+        'y_new': polynomial(np.asarray(new_x, dtype=float)),
+    }
@@ -0,0 +1,330 @@
+#%%
+# columnar (Parquet) cache for pd.read_excel imports
+# each requested sheet is parsed with openpyxl once and served from Parquet afterwards,
+# until the workbook changes (modification time and size, or content hash)
+#
+# usage from a figure script (scripts are run from their own directory):
+#   import sys; sys.path.append('../utilities')
+#   from excel_cache import read_excel_cached
+#   df = read_excel_cached(io = 'data/data.xlsx', sheet_name = 'Swiss', dtype = float, decimal = ',', engine = 'openpyxl')
+
+# IMPORTS #######################################
+
+# sys
+import os
+import json
+import hashlib
+import datetime
+import warnings
+# i/o
+from pathlib import Path
+# data science
+import numpy as np
+import pandas as pd
+
+# DATA ##########################################
+
+path_cache_default: Path = Path.home() / '.cache' / 'phd_publication_figures' / 'excel'
+
+# FUNCTIONS #####################################
+
+def describe_code(
+    code,
+) -> str:
+    """
+    Bytecode, names and constants of a code object; nested code objects (comprehensions, inner lambdas)
+    are described recursively, since their repr contains a memory address.
+    """
+    consts = [describe_code(const) if hasattr(const, 'co_code') else repr(const) for const in code.co_consts]
+    return f'{code.co_code.hex()}{consts!r}{code.co_names!r}{code.co_freevars!r}'
+
+
+def get_code_names(
+    code,
+) -> set[str]:
+    """
+    Global (and attribute) names used by a code object and the code objects nested in it.
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            names |= get_code_names(const)
+    return names
+
+
+def describe_argument(
+    value,
+    seen: frozenset = frozenset(),
+) -> str | None:
+    """
+    Stable text representation of a read_excel argument for the cache key, or None if it can not be described reliably.
+    Functions (e.g. `usecols = lambda column: column in [...]`) are described by their code,
+    the values of the globals they refer to and the contents of their closure cells
+    (e.g. the list `columns` of `lambda column: column in columns` defined inside a helper function),
+    since their repr contains a memory address that changes between runs.
+    Objects whose repr contains a memory address (callable instances, partials, ...) or is abbreviated
+    (large arrays) can not be described.
+    """
+    if callable(value) and hasattr(value, '__code__'):
+        if id(value) in seen: # recursive function
+            return value.__qualname__
+        seen = seen | {id(value)}
+        list_parts = [describe_code(value.__code__), describe_argument(value.__defaults__, seen), describe_argument(value.__kwdefaults__, seen)]
+        for name in sorted(get_code_names(value.__code__)):
+            if name in value.__globals__ and not isinstance(value.__globals__[name], type(os)): # modules (np, pd) are skipped
+                list_parts.append(describe_argument(value.__globals__[name], seen))
+        for cell in value.__closure__ or ():
+            try:
+                list_parts.append(describe_argument(cell.cell_contents, seen))
+            except ValueError: # empty cell
+                return None
+        return None if None in list_parts else repr(list_parts)
+    if isinstance(value, dict):
+        list_items = [(repr(key), describe_argument(item, seen)) for key, item in value.items()]
+        return None if any(item is None for _, item in list_items) else repr(sorted(list_items))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        list_items = [describe_argument(item, seen) for item in value]
+        if None in list_items:
+            return None
+        return repr(sorted(list_items)) if isinstance(value, (set, frozenset)) else f'{type(value).__name__}{list_items!r}'
+    if isinstance(value, type):
+        return value.__name__
+    description = repr(value)
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return description
+    return None if ' at 0x' in description or '...' in description else description
+
+
+def hash_file(
+    path: Path,
+    chunk_size: int = 2**20,
+) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cache_key(
+    path_workbook: Path,
+    sheet_name: str | int,
+    kwargs: dict,
+) -> str | None:
+    """
+    Cache key of one sheet: hash of the absolute workbook path, the sheet and all other read_excel arguments
+    (usecols, dtype, header, decimal, ...). None if an argument can not be described (see `describe_argument`).
+    """
+    description = describe_argument({
+        'path': str(path_workbook.resolve()),
+        'sheet_name': sheet_name,
+        **kwargs,
+    })
+    if description is None:
+        return None
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+def encode_label(
+    label,
+) -> list | None:
+    """
+    Column label as [type, JSON value], e.g. the integer year header 1970 -> ['int', 1970]; None if not supported.
+    """
+    if isinstance(label, (bool, np.bool_)):
+        return ['bool', bool(label)]
+    if isinstance(label, (int, np.integer)):
+        return ['int', int(label)]
+    if isinstance(label, (float, np.floating)):
+        return ['float', float(label)]
+    if isinstance(label, str):
+        return ['str', label]
+    if isinstance(label, datetime.datetime):
+        return ['datetime', pd.Timestamp(label).isoformat()]
+    if label is None:
+        return ['none', None]
+    return None
+
+
+def decode_label(
+    encoded: list,
+):
+    kind, value = encoded
+    if kind == 'datetime':
+        return pd.Timestamp(value)
+    return value
+
+
+def write_metadata(
+    path_metadata: Path,
+    dict_metadata: dict,
+) -> None:
+    path_temporary = path_metadata.with_name(f'{path_metadata.stem}.{os.getpid()}.tmp')
+    path_temporary.write_text(json.dumps(dict_metadata))
+    os.replace(path_temporary, path_metadata)
+
+
+def load_metadata(
+    path_metadata: Path,
+    path_workbook: Path,
+    validate: str,
+) -> dict | None:
+    """
+    Metadata of a cached sheet if it is valid, else None.
+    A cached sheet is valid if the workbook's modification time and size are unchanged.
+    With validate = 'hash', a changed modification time (e.g. after a checkout) is accepted
+    if the content hash is unchanged; the stored modification time is then updated.
+    """
+    if not path_metadata.exists():
+        return None
+    try:
+        dict_metadata = json.loads(path_metadata.read_text())
+    except (OSError, ValueError):
+        return None
+    if 'columns' not in dict_metadata: # written before column labels were stored
+        return None
+    stat = path_workbook.stat()
+    if dict_metadata['mtime_ns'] == stat.st_mtime_ns and dict_metadata['size'] == stat.st_size:
+        return dict_metadata
+    if validate == 'hash' and dict_metadata.get('sha256') == hash_file(path_workbook):
+        dict_metadata.update({'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size})
+        write_metadata(path_metadata, dict_metadata)
+        return dict_metadata
+    return None
+
+
+def read_cache(
+    path_parquet: Path,
+    dict_metadata: dict,
+) -> pd.DataFrame:
+    """
+    Reads a cached sheet and restores its column labels, which Parquet stores as strings
+    (e.g. integer year headers), with their original types.
+    """
+    df = pd.read_parquet(path_parquet)
+    df.columns = pd.Index(
+        [decode_label(label) for label in dict_metadata['columns']],
+        dtype = dict_metadata['columns_dtype'],
+        name = decode_label(dict_metadata['columns_name']),
+    )
+    return df
+
+
+def write_cache(
+    df: pd.DataFrame,
+    path_parquet: Path,
+    path_metadata: Path,
+    path_workbook: Path,
+    sheet_name: str | int,
+    validate: str,
+) -> None:
+    """
+    Writes one sheet to Parquet, followed by its metadata (so a sheet is only valid once completely written).
+    The column labels and their types are kept in the metadata; sheets with non-string labels are written
+    with positional column names. The written file is read back and compared with `df`:
+    sheets that do not round-trip exactly (e.g. object columns of mixed types, MultiIndex headers) are not cached.
+    """
+    list_labels = [encode_label(label) for label in df.columns]
+    label_name = encode_label(df.columns.name)
+    if isinstance(df.columns, pd.MultiIndex) or None in list_labels or label_name is None:
+        warnings.warn(f"Sheet '{sheet_name}' of {path_workbook} is not cached: column labels {list(df.columns[:5])} can not be stored")
+        return
+    dict_metadata = {
+        'workbook': str(path_workbook.resolve()),
+        'sheet_name': sheet_name,
+        'columns': list_labels,
+        'columns_dtype': str(df.columns.dtype),
+        'columns_name': label_name,
+    }
+    if all(kind == 'str' for kind, _ in list_labels) and df.columns.is_unique:
+        df_write = df
+    else:
+        df_write = df.set_axis([str(position) for position in range(df.shape[1])], axis=1)
+
+    stat = path_workbook.stat()
+    path_temporary = path_parquet.with_name(f'{path_parquet.stem}.{os.getpid()}.tmp.parquet')
+    try:
+        df_write.to_parquet(path_temporary)
+        pd.testing.assert_frame_equal(df, read_cache(path_temporary, dict_metadata))
+    except (ValueError, TypeError, AssertionError) as error:
+        path_temporary.unlink(missing_ok=True)
+        warnings.warn(f"Sheet '{sheet_name}' of {path_workbook} is not cached: {error}")
+        return
+    os.replace(path_temporary, path_parquet)
+    write_metadata(path_metadata, {
+        **dict_metadata,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': hash_file(path_workbook) if validate == 'hash' else None,
+    })
+
+
+def read_excel_cached(
+    io: str | Path,
+    sheet_name: str | int | list[str | int] = 0,
+    validate: str = 'mtime',
+    path_cache: Path = path_cache_default,
+    **kwargs,
+) -> pd.DataFrame | dict[str | int, pd.DataFrame]:
+    """
+    Drop-in for `pd.read_excel(io, sheet_name, **kwargs)` with a Parquet cache per sheet,
+    keyed by workbook path, sheet and the other arguments (usecols, dtype, ...).
+    Sheets missing from the cache (or outdated) are parsed from the workbook in one read_excel call.
+
+    validate = 'mtime': the cache is invalidated when the workbook's modification time or size change.
+    validate = 'hash': additionally, the content hash is compared if the modification time changed.
+
+    Calls whose arguments can not be keyed reliably (see `describe_argument`) are not cached.
+
+    The cache directory can be overridden with the PHD_FIGURES_CACHE environment variable
+    (sheets are kept in its 'excel' subdirectory); setting it to an empty string disables caching.
+    Without pyarrow, the sheets are read from the workbook directly, with a warning.
+    """
+    if validate not in ('mtime', 'hash'):
+        raise ValueError("validate must be 'mtime' or 'hash'")
+    if sheet_name is None:
+        raise ValueError("sheet_name = None (all sheets) is not supported; list the sheets to be read")
+    if os.environ.get('PHD_FIGURES_CACHE') == '':
+        return pd.read_excel(io, sheet_name=sheet_name, **kwargs)
+    if 'PHD_FIGURES_CACHE' in os.environ:
+        path_cache = Path(os.environ['PHD_FIGURES_CACHE']) / 'excel'
+
+    path_workbook = Path(io)
+    list_sheets = sheet_name if isinstance(sheet_name, list) else [sheet_name]
+    dict_paths = {}
+    for sheet in list_sheets:
+        key = get_cache_key(path_workbook, sheet, kwargs)
+        if key is None: # e.g. usecols is a callable object: its result can not be keyed reliably
+            return pd.read_excel(io, sheet_name=sheet_name, **kwargs)
+        dict_paths[sheet] = (path_cache / f'{key}.parquet', path_cache / f'{key}.json')
+
+    dict_sheets = {}
+    list_missing = []
+    for sheet, (path_parquet, path_metadata) in dict_paths.items():
+        dict_metadata = load_metadata(path_metadata, path_workbook, validate)
+        if dict_metadata is not None and path_parquet.exists():
+            try:
+                dict_sheets[sheet] = read_cache(path_parquet, dict_metadata)
+                continue
+            except ImportError:
+                warnings.warn("pyarrow is not installed; reading the workbook without cache")
+                return pd.read_excel(io, sheet_name=sheet_name, **kwargs)
+            except (OSError, ValueError):
+                pass # unreadable cache file: read the sheet again
+        list_missing.append(sheet)
+
+    if list_missing:
+        dict_read = pd.read_excel(io, sheet_name=list_missing, **kwargs)
+        path_cache.mkdir(parents=True, exist_ok=True)
+        for sheet, df in dict_read.items():
+            try:
+                write_cache(df, *dict_paths[sheet], path_workbook, sheet, validate)
+            except ImportError:
+                warnings.warn("pyarrow is not installed; sheets are not cached")
+                dict_sheets.update(dict_read)
+                break
+            dict_sheets[sheet] = df
+
+    if isinstance(sheet_name, list):
+        return {sheet: dict_sheets[sheet] for sheet in list_sheets}
+    return dict_sheets[sheet_name]
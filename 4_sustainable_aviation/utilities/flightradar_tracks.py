@@ -0,0 +1,160 @@
+#%%
+# reader for Flightradar24 track exports (Timestamp,UTC,Callsign,Position,Altitude,Speed,Direction)
+# parses the quoted "lat,lon" Position pair straight into float columns, without the object-dtype
+# `str.split(',', expand=True)` frames of map_routing.py and map_corsia_euets_v1/v2.py,
+# and streams directories of track files in chunks
+#
+# usage from a figure script (scripts are run from their own directory):
+#   import sys; sys.path.append('../utilities')
+#   from flightradar_tracks import read_track, read_track_directory
+#   df_finnair = read_track('data/AY99_2f2a9256.csv')
+#   for df_chunk in read_track_directory('data/2023-07'): ...
+
+# IMPORTS #######################################
+
+# sys
+import io
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+# i/o
+from pathlib import Path
+# data science
+import numpy as np
+import pandas as pd
+
+# DATA ##########################################
+
+header_flightradar: bytes = b'Timestamp,UTC,Callsign,Position,Altitude,Speed,Direction'
+
+# columns after removing the quotes around Position, which splits it into lat and lon
+list_columns: list[str] = ['timestamp', 'utc', 'callsign', 'lat', 'lon', 'altitude', 'speed', 'direction']
+dict_dtypes: dict[str, str] = { # 'utc' is not parsed, it is the text form of 'timestamp'
+    'timestamp': 'int64',
+    'callsign': 'str',
+    'lat': 'float64',
+    'lon': 'float64',
+    'altitude': 'float32', # [ft]
+    'speed': 'float32', # [kt]
+    'direction': 'float32', # [deg]
+}
+
+# pyarrow's CSV reader (types columns while parsing, multithreaded), if installed; else the pandas C parser
+engine_default: str = 'pyarrow' if importlib.util.find_spec('pyarrow') else 'c'
+
+# FUNCTIONS #####################################
+
+def split_header(
+    data: bytes,
+    source: str = '',
+) -> bytes:
+    """
+    Checks the header of a track export and returns its data lines, with the quotes around Position removed
+    (so that lat and lon become two ordinary numeric fields) and without carriage returns and trailing newlines.
+    """
+    line_header, _, body = data.partition(b'\n')
+    if line_header.strip() != header_flightradar:
+        raise ValueError(f"{source} is not a Flightradar24 track export: header {line_header[:80]!r}")
+    return body.replace(b'"', b'').replace(b'\r', b'').rstrip(b'\n')
+
+
+def parse_track_body(
+    body: bytes,
+    engine: str = engine_default,
+) -> pd.DataFrame:
+    """
+    Parses data lines (see `split_header`) of one or many track exports into typed columns (see `dict_dtypes`).
+    The 'utc' text column is skipped; 'time' (datetime64, UTC) is computed from the integer 'timestamp' instead.
+    """
+    if not body:
+        df = pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in dict_dtypes.items()})
+    elif engine == 'pyarrow':
+        import pyarrow as pa
+        import pyarrow.csv
+        table = pa.csv.read_csv(
+            io.BytesIO(body),
+            read_options = pa.csv.ReadOptions(column_names = list_columns),
+            convert_options = pa.csv.ConvertOptions(
+                include_columns = list(dict_dtypes),
+                column_types = {column: pa.from_numpy_dtype(np.dtype(dtype)) if dtype != 'str' else pa.string() for column, dtype in dict_dtypes.items()},
+            ),
+        )
+        df = table.to_pandas()
+    else:
+        df = pd.read_csv(
+            io.BytesIO(body),
+            header = None,
+            names = list_columns,
+            usecols = list(dict_dtypes),
+            dtype = dict_dtypes,
+            engine = engine,
+        )
+    df['time'] = pd.to_datetime(df['timestamp'].to_numpy(), unit='s', utc=True)
+    return df
+
+
+def read_track(
+    path: str | Path,
+    engine: str = engine_default,
+) -> pd.DataFrame:
+    """
+    Reads one track export into a DataFrame with the columns
+    'timestamp', 'callsign', 'lat', 'lon', 'altitude', 'speed', 'direction' and 'time'.
+    E.g. (df['lon'], df['lat']) are the coordinates used by `extract_coordinates_from_csv` in map_routing.py.
+    """
+    return parse_track_body(split_header(Path(path).read_bytes(), source=str(path)), engine=engine)
+
+
+def read_first_timestamp(
+    path: Path,
+) -> int:
+    """
+    Timestamp of the first point of a track export, read from its first data line only
+    (-1 for an export without points).
+    """
+    with open(path, 'rb') as file:
+        file.readline()
+        field = file.readline().split(b',', 1)[0].strip()
+    return int(field) if field else -1
+
+
+def read_track_directory(
+    directory: str | Path,
+    pattern: str = '*.csv',
+    files_per_chunk: int = 1000,
+    max_workers: int | None = None,
+    engine: str = engine_default,
+    order: str = 'name',
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams all track exports matching `pattern` in `directory`, `files_per_chunk` files at a time,
+    sorted by file name (order = 'name') or by the time of their first point (order = 'time').
+    The files of a chunk are read in parallel threads and their data lines are concatenated and parsed in one call,
+    instead of one (small, overhead-dominated) parse per file.
+    Yields one DataFrame per chunk, with the columns of `read_track` and a categorical 'flight' column
+    (path relative to `directory` without extension, e.g. 'AY99_2f2a9256'). Memory use is bounded by one chunk.
+    Files that are not track exports raise a ValueError naming the file.
+    """
+    directory = Path(directory)
+    list_paths = sorted(directory.glob(pattern))
+    if order == 'time':
+        list_paths = sorted(list_paths, key=read_first_timestamp)
+    elif order != 'name':
+        raise ValueError("order must be 'name' or 'time'")
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        for start in range(0, len(list_paths), files_per_chunk):
+            list_chunk = list_paths[start:start + files_per_chunk]
+            list_bodies = list(executor.map(lambda path: split_header(path.read_bytes(), source=str(path)), list_chunk))
+            n_rows = [body.count(b'\n') + 1 if body else 0 for body in list_bodies]
+            df_chunk = parse_track_body(b'\n'.join(body for body in list_bodies if body), engine=engine)
+            if len(df_chunk) != sum(n_rows):
+                raise ValueError(f"Empty lines in the track exports {list_chunk[0]} to {list_chunk[-1]}; rows can not be assigned to flights")
+            df_chunk.insert(
+                0,
+                'flight',
+                pd.Categorical.from_codes(
+                    codes = np.repeat(np.arange(len(list_chunk)), n_rows),
+                    categories = [str(path.relative_to(directory).with_suffix('')) for path in list_chunk],
+                ),
+            )
+            yield df_chunk
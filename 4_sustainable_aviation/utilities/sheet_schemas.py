@@ -0,0 +1,280 @@
+#%%
+# registry of the datasets read by the figure scripts: workbook, sheet, columns with dtype and unit, decimal convention
+# replaces the repeated `usecols = lambda column: column in [...]` lists and `dtype = {...}` dicts of the scripts;
+# only the declared columns are parsed, directly into compact dtypes (float32, categorical), and checked in bulk
+#
+# usage from a figure script (scripts are run from their own directory):
+#   import sys; sys.path.append('../utilities')
+#   from sheet_schemas import load_datasets
+#   dict_datasets = load_datasets(['net_zero_scenarios/Destination2050', 'net_zero_scenarios/Swiss'])
+
+# IMPORTS #######################################
+
+# sys
+import re
+# i/o
+from pathlib import Path
+# data science
+import numpy as np
+import pandas as pd
+# utilities
+from workbook_reader import read_workbook_sheets
+
+# DATA ##########################################
+
+# workbook paths are relative to the 4_sustainable_aviation directory
+path_root: Path = Path(__file__).resolve().parent.parent
+
+# FUNCTIONS #####################################
+
+def parse_unit(
+    column: str,
+) -> str | None:
+    """
+    Unit in square brackets at the end of a column name, e.g. 'ERF Average [mW/m2]' -> 'mW/m2'.
+    """
+    match = re.search(r'\[([^\]]*)\]\s*$', column)
+    return match.group(1) if match else None
+
+
+def define_columns(
+    columns: list[str],
+    dtype: str = 'float32',
+    **checks,
+) -> dict[str, dict]:
+    """
+    Column definitions {column: {'dtype', 'unit', 'nullable', 'min', 'max'}} for columns of the same type.
+    The unit is parsed from the column name; `checks` may set 'nullable' (default True), 'min' and 'max'.
+    """
+    return {
+        column: {'dtype': dtype, 'unit': parse_unit(column), 'nullable': True, **checks}
+        for column in columns
+    }
+
+
+def define_digitized_curves(
+    curves: list[str],
+    unit_y: str | None = None,
+) -> dict[str, dict]:
+    """
+    Column definitions of digitized curves, stored as pairs 'name (x)' (year) and 'name (y)'.
+    Years are kept as float64, so that interpolations at integer years match the scripts exactly.
+    """
+    dict_columns = {}
+    for curve in curves:
+        dict_columns[f'{curve} (x)'] = {'dtype': 'float64', 'unit': 'year', 'nullable': True, 'min': 1900, 'max': 2100}
+        dict_columns[f'{curve} (y)'] = {'dtype': 'float32', 'unit': unit_y, 'nullable': True}
+    return dict_columns
+
+# SCHEMAS #######################################
+
+list_erf_columns: list[str] = [
+    'ERF Average [mW/m2]',
+    'ERF Lower Errorbar [mW/m2]',
+    'ERF Upper Errorbar [mW/m2]',
+]
+
+dict_schemas: dict[str, dict] = {
+    'energy_density/Acft Replacement': {
+        'io': 'energy_density/data/data.xlsx',
+        'sheet_name': 'Acft Replacement',
+        'decimal': '.',
+        'columns': {
+            **define_columns(
+                [
+                    f'battery energy density, {traffic} traffic, {emf} [Wh/kg]'
+                    for traffic in ['commuter', 'turboprop']
+                    for emf in ['current EMF', '15% EMF reduction', '30% EMF reduction']
+                ],
+                min = 0,
+            ),
+            **define_columns(
+                [
+                    f'replacable {traffic} traffic, {emf} [%]'
+                    for traffic in ['commuter', 'turboprop']
+                    for emf in ['current EMF', '15% EMF reduction', '30% EMF reduction']
+                ],
+                min = 0,
+                max = 100,
+            ),
+        },
+    },
+    'net_zero_scenarios/Destination2050': {
+        'io': 'net_zero_scenarios/data/data.xlsx',
+        'sheet_name': 'Destination2050',
+        'decimal': ',',
+        'columns': define_digitized_curves([
+            'hypothetical_reference',
+            'kerosene',
+            'hydrogen',
+            'effect_hydrogen',
+            'improved_ATM_and_operations',
+            'SAF',
+            'effect_SAF',
+            'economic_measures',
+            'effect_economic_measures',
+            'Net_CO2_emissions',
+        ]),
+    },
+    'net_zero_scenarios/Eurocontrol': {
+        'io': 'net_zero_scenarios/data/data.xlsx',
+        'sheet_name': 'Eurocontrol',
+        'decimal': ',',
+        'columns': define_digitized_curves(['best_case', 'Other', 'SAF', 'ATM', 'Fleet_revol', 'Fleet_evol']),
+    },
+    'net_zero_scenarios/Swiss': {
+        'io': 'net_zero_scenarios/data/data.xlsx',
+        'sheet_name': 'Swiss',
+        'decimal': ',',
+        'columns': define_digitized_curves(['efficiency', 'ops', 'econ', 'reduced', 'offset', 'saf']),
+    },
+    'net_zero_scenarios/WayPoint2050': {
+        'io': 'net_zero_scenarios/data/data.xlsx',
+        'sheet_name': 'WayPoint2050',
+        'decimal': ',',
+        'columns': define_digitized_curves([
+            'reduced',
+            'MarketBased_Measure',
+            'SAF',
+            'Operations_and_Infrastructure',
+            'Technology',
+        ]),
+    },
+    **{
+        f'radiative_forcing/{sheet}': {
+            'io': 'radiative_forcing/data/data.xlsx',
+            'sheet_name': sheet,
+            'decimal': '.',
+            'columns': {
+                'Authors (Label)': {'dtype': 'category', 'unit': None, 'nullable': False},
+                **define_columns(list_erf_columns),
+                **({'Effect': {'dtype': 'category', 'unit': None, 'nullable': True}} if has_effect else {}),
+            },
+        }
+        for sheet, has_effect in [
+            ('CO2', False),
+            ('NOx', True),
+            ('Water Vapor', False),
+            ('Aerosols-Radiation', True),
+            ('Aerosols-NaturalClouds', True),
+            ('Contrail-Cirrus', True),
+        ]
+    },
+}
+
+# LOADING #######################################
+
+def register_schema(
+    name: str,
+    io: str,
+    sheet_name: str,
+    columns: dict[str, dict],
+    decimal: str = '.',
+    header: int = 0,
+) -> None:
+    """
+    Adds a dataset to `dict_schemas`, e.g. from a script with a sheet not (yet) declared here.
+    `columns` as returned by `define_columns` or `define_digitized_curves`.
+    """
+    dict_schemas[name] = {
+        'io': io,
+        'sheet_name': sheet_name,
+        'decimal': decimal,
+        'header': header,
+        'columns': columns,
+    }
+
+
+def get_units(
+    name: str,
+) -> dict[str, str | None]:
+    return {column: definition['unit'] for column, definition in dict_schemas[name]['columns'].items()}
+
+
+def validate_dataset(
+    df: pd.DataFrame,
+    name: str,
+) -> list[str]:
+    """
+    Checks a loaded dataset against its schema: declared columns present, no missing values
+    in non-nullable columns, values within 'min'/'max'. All checks run column-wise on the full arrays.
+    Returns the list of problems found (empty if valid).
+    """
+    list_problems = []
+    for column, definition in dict_schemas[name]['columns'].items():
+        if column not in df.columns:
+            list_problems.append(f"{name}: column '{column}' missing")
+            continue
+        values = df[column]
+        if not definition.get('nullable', True) and values.isna().any():
+            list_problems.append(f"{name}: column '{column}' has {values.isna().sum()} missing values")
+        if 'min' in definition or 'max' in definition:
+            array = values.to_numpy(dtype=float)
+            with np.errstate(invalid='ignore'):
+                below = array < definition.get('min', -np.inf)
+                above = array > definition.get('max', np.inf)
+            if below.any() or above.any():
+                list_problems.append(
+                    f"{name}: column '{column}' has {below.sum() + above.sum()} values outside of "
+                    f"[{definition.get('min', -np.inf)}, {definition.get('max', np.inf)}] {definition['unit'] or ''}".rstrip()
+                )
+    return list_problems
+
+
+def load_datasets(
+    names: list[str],
+    validate: bool = True,
+) -> dict[str, pd.DataFrame]:
+    """
+    Loads the datasets `names` of `dict_schemas`.
+    Each workbook is opened once for all of its datasets (see workbook_reader.py); only the declared columns are parsed,
+    directly into their declared dtypes. With `validate`, all datasets are checked by `validate_dataset`
+    and a ValueError lists every problem found, including all declared columns missing from the sheets.
+    Without `validate`, only missing columns raise the ValueError.
+    Returns {name: DataFrame}.
+    """
+    unknown = [name for name in names if name not in dict_schemas]
+    if unknown:
+        raise ValueError(f"No schema registered for {unknown}")
+
+    dict_workbooks = {}
+    for name in names:
+        dict_workbooks.setdefault(dict_schemas[name]['io'], []).append(name)
+
+    dict_datasets = {}
+    for io, list_names in dict_workbooks.items():
+        # datasets on the same sheet are read together, with the union of their columns
+        dict_sheets = {}
+        for name in list_names:
+            schema = dict_schemas[name]
+            options = dict_sheets.setdefault(schema['sheet_name'], {
+                'usecols': [],
+                'dtype': {},
+                'header': schema.get('header', 0),
+                'decimal': schema['decimal'],
+            })
+            for column, definition in schema['columns'].items():
+                if column not in options['dtype']:
+                    options['usecols'].append(column)
+                    options['dtype'][column] = definition['dtype']
+        # usecols as callable, so that missing columns are left out here and reported by `validate_dataset`
+        # together with all other problems, instead of failing on the first one
+        for options in dict_sheets.values():
+            options['usecols'] = lambda column, declared=frozenset(options['usecols']): column in declared
+        dict_read = read_workbook_sheets(path_root / io, dict_sheets)
+        for name in list_names:
+            schema = dict_schemas[name]
+            df_sheet = dict_read[schema['sheet_name']]
+            dict_datasets[name] = df_sheet[[column for column in schema['columns'] if column in df_sheet.columns]]
+
+    if validate:
+        list_problems = [problem for name, df in dict_datasets.items() for problem in validate_dataset(df, name)]
+    else:
+        list_problems = [
+            f"{name}: column '{column}' missing"
+            for name, df in dict_datasets.items()
+            for column in dict_schemas[name]['columns'] if column not in df.columns
+        ]
+    if list_problems:
+        raise ValueError("Datasets do not match their schema:\n" + "\n".join(list_problems))
+    return dict_datasets
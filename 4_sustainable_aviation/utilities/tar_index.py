@@ -0,0 +1,163 @@
+#%%
+# random access to single members of the (uncompressed) raw-data tar archives, e.g. the WebPlotDigitizer projects
+# net_zero_scenarios/data/swiss.tar, energy_density/data/raw/cao_2020.tar, ...
+# the member offsets of each archive are indexed once and kept in the cache,
+# so a member is read with one seek instead of extracting or scanning the archive
+#
+# usage from a figure script (scripts are run from their own directory):
+#   import sys; sys.path.append('../utilities')
+#   from tar_index import read_wpd_datasets
+#   df_swiss_digitized = read_wpd_datasets('data/swiss.tar')
+
+# IMPORTS #######################################
+
+# sys
+import os
+import io
+import json
+import hashlib
+import tarfile
+# i/o
+from pathlib import Path
+# data science
+import pandas as pd
+
+# DATA ##########################################
+
+path_cache_default: Path = Path.home() / '.cache' / 'phd_publication_figures' / 'tar'
+
+# FUNCTIONS #####################################
+
+def get_path_index(
+    path_tar: Path,
+    path_cache: Path = path_cache_default,
+) -> Path:
+    if os.environ.get('PHD_FIGURES_CACHE'):
+        path_cache = Path(os.environ['PHD_FIGURES_CACHE']) / 'tar'
+    return path_cache / f"{hashlib.sha256(str(path_tar.resolve()).encode()).hexdigest()}.json"
+
+
+def build_tar_index(
+    path_tar: str | Path,
+) -> dict[str, dict]:
+    """
+    Scans the headers of an uncompressed tar archive once (member data is skipped, not read)
+    and returns {member name: {'offset': start of data [bytes], 'size': [bytes], 'mtime', 'type'}}.
+    GNU/PAX long names are resolved by tarfile, so the offsets point at the member data itself.
+    """
+    try:
+        archive = tarfile.open(path_tar, mode='r:')
+    except tarfile.ReadError as error:
+        raise ValueError(f"{path_tar} is not an uncompressed tar archive; members of compressed archives can not be read by offset") from error
+    with archive:
+        return {
+            member.name: {
+                'offset': member.offset_data,
+                'size': member.size,
+                'mtime': member.mtime,
+                'type': 'file' if member.isfile() else 'directory' if member.isdir() else 'other',
+            }
+            for member in archive.getmembers()
+        }
+
+
+def load_tar_index(
+    path_tar: str | Path,
+    path_cache: Path = path_cache_default,
+) -> dict[str, dict]:
+    """
+    Returns the member index of `build_tar_index`, from the cache if the archive's modification time and size
+    are unchanged, else rebuilt and saved. Setting the PHD_FIGURES_CACHE environment variable to an empty string
+    disables the cache (the index is rebuilt in memory on every call).
+    """
+    path_tar = Path(path_tar)
+    if os.environ.get('PHD_FIGURES_CACHE') == '':
+        return build_tar_index(path_tar)
+    stat = path_tar.stat()
+    path_index = get_path_index(path_tar, path_cache)
+    if path_index.exists():
+        try:
+            dict_cached = json.loads(path_index.read_text())
+            if dict_cached['mtime_ns'] == stat.st_mtime_ns and dict_cached['size'] == stat.st_size:
+                return dict_cached['members']
+        except (OSError, ValueError, KeyError):
+            pass # unreadable index: rebuild
+
+    dict_members = build_tar_index(path_tar)
+    path_index.parent.mkdir(parents=True, exist_ok=True)
+    path_temporary = path_index.with_name(f'{path_index.stem}.{os.getpid()}.tmp')
+    path_temporary.write_text(json.dumps({
+        'archive': str(path_tar.resolve()),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'members': dict_members,
+    }))
+    os.replace(path_temporary, path_index)
+    return dict_members
+
+
+def find_members(
+    path_tar: str | Path,
+    suffix: str = '',
+) -> list[str]:
+    """
+    Names of the file members whose name ends with `suffix` (all files if empty), in archive order.
+    """
+    return [
+        name for name, member in load_tar_index(path_tar).items()
+        if member['type'] == 'file' and name.endswith(suffix)
+    ]
+
+
+def read_tar_member(
+    path_tar: str | Path,
+    member: str,
+) -> bytes:
+    """
+    Reads one member of an archive: a single seek to its indexed offset and a read of its size.
+    """
+    dict_members = load_tar_index(path_tar)
+    if member not in dict_members or dict_members[member]['type'] != 'file':
+        raise ValueError(f"{member} is not a file in {path_tar}; files: {find_members(path_tar)}")
+    with open(path_tar, 'rb') as file:
+        file.seek(dict_members[member]['offset'])
+        data = file.read(dict_members[member]['size'])
+    if len(data) != dict_members[member]['size']:
+        raise ValueError(f"{path_tar} is truncated: {member} is incomplete")
+    return data
+
+
+def read_tar_csv(
+    path_tar: str | Path,
+    member: str,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    pd.read_csv of one archive member, without extracting the archive. `kwargs` are passed on to pd.read_csv.
+    """
+    return pd.read_csv(io.BytesIO(read_tar_member(path_tar, member)), **kwargs)
+
+
+def read_wpd_datasets(
+    path_tar: str | Path,
+    member: str | None = None,
+) -> pd.DataFrame:
+    """
+    Digitized data of a WebPlotDigitizer project archive (its wpd.json member, or `member`),
+    as a long DataFrame with the columns 'dataset', 'x' and 'y' (calibrated values, in the order digitized).
+    """
+    if member is None:
+        list_json = find_members(path_tar, suffix='wpd.json')
+        if len(list_json) != 1:
+            raise ValueError(f"Expected one wpd.json in {path_tar}, found {list_json}; pass `member`")
+        member = list_json[0]
+    dict_project = json.loads(read_tar_member(path_tar, member))
+    list_rows = [
+        (dataset['name'], point['value'][0], point['value'][1])
+        for dataset in dict_project['datasetColl']
+        for point in dataset['data']
+    ]
+    return pd.DataFrame(
+        data = list_rows,
+        columns = ['dataset', 'x', 'y'],
+    )
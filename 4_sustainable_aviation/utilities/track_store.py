@@ -0,0 +1,216 @@
+#%%
+# on-disk columnar store of parsed Flightradar24 tracks (see flightradar_tracks.py)
+# points.parquet holds all track points with an integer flight id, flights.parquet one row per flight
+# with its row offsets, row groups, bounding box and time range; queries select flights from the index
+# and read only the row groups that contain them
+#
+# usage from a figure script (scripts are run from their own directory):
+#   import sys; sys.path.append('../utilities')
+#   from track_store import build_track_store, query_tracks
+#   build_track_store('data', 'data/store') # once, after adding track exports
+#   df_july = query_tracks('data/store', bbox = (-10, 35, 30, 70), time_range = ('2023-07-01', '2023-08-01'))
+
+# IMPORTS #######################################
+
+# sys
+import os
+import shutil
+# i/o
+from pathlib import Path
+# data science
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+# utilities
+from flightradar_tracks import read_track_directory
+
+# DATA ##########################################
+
+list_point_columns: list[str] = ['flight_id', 'timestamp', 'lat', 'lon', 'altitude', 'speed', 'direction']
+
+# FUNCTIONS #####################################
+
+def summarize_flights(
+    df_points: pd.DataFrame,
+    first_flight_id: int,
+    first_row: int,
+) -> pd.DataFrame:
+    """
+    One row per flight of a chunk of points (flights contiguous, in the order of their 'flight' categories):
+    id, name, callsign, global row offsets [row_start, row_end), bounding box and time range.
+    """
+    codes = df_points['flight'].cat.codes.to_numpy().astype(np.int64)
+    n_flights = len(df_points['flight'].cat.categories)
+    counts = np.bincount(codes, minlength=n_flights)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    present = counts > 0 # empty exports have no points and are not indexed
+    grouped = df_points.groupby(codes)
+    df_flights = pd.DataFrame({
+        'flight_id': first_flight_id + np.arange(n_flights, dtype=np.int64)[present],
+        'flight': np.asarray(df_points['flight'].cat.categories)[present],
+        'callsign': grouped['callsign'].first().to_numpy(),
+        'row_start': first_row + starts[present],
+        'row_end': first_row + starts[present] + counts[present],
+        'lat_min': grouped['lat'].min().to_numpy(),
+        'lat_max': grouped['lat'].max().to_numpy(),
+        'lon_min': grouped['lon'].min().to_numpy(),
+        'lon_max': grouped['lon'].max().to_numpy(),
+        'time_start': pd.to_datetime(grouped['timestamp'].min().to_numpy(), unit='s', utc=True),
+        'time_end': pd.to_datetime(grouped['timestamp'].max().to_numpy(), unit='s', utc=True),
+    })
+    return df_flights
+
+
+def to_utc(
+    time_range: tuple,
+) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """
+    (start, end) as UTC timestamps; times without time zone are taken as UTC.
+    """
+    return tuple(pd.Timestamp(time).tz_localize('UTC') if pd.Timestamp(time).tzinfo is None else pd.Timestamp(time) for time in time_range)
+
+
+def build_track_store(
+    directory_tracks: str | Path,
+    path_store: str | Path,
+    pattern: str = '*.csv',
+    files_per_chunk: int = 1000,
+    row_group_size: int = 65_536,
+) -> pd.DataFrame:
+    """
+    Parses all track exports in `directory_tracks` (streamed in chunks, see `read_track_directory`)
+    into a store directory `path_store`, replacing an existing store:
+
+    - points.parquet: columns `list_point_columns` (flight_id as int64, as in the index), flights contiguous
+      and ordered by start time, in row groups of at most `row_group_size` points
+    - flights.parquet: index of `summarize_flights`, plus the first and last row group of every flight
+
+    Returns the flight index.
+    """
+    path_store = Path(path_store)
+    path_temporary = path_store.with_name(f'{path_store.name}.{os.getpid()}.tmp')
+    shutil.rmtree(path_temporary, ignore_errors=True)
+    path_temporary.mkdir(parents=True)
+
+    list_df_flights = []
+    n_flights = 0
+    n_rows = 0
+    writer = None
+    # flights in order of their start time, so that flights of the same period share row groups
+    for df_chunk in read_track_directory(directory_tracks, pattern=pattern, files_per_chunk=files_per_chunk, order='time'):
+        df_flights = summarize_flights(df_chunk, n_flights, n_rows)
+        # codes are int8/int16 depending on the number of files of the chunk: cast before adding the offset
+        df_chunk['flight_id'] = n_flights + df_chunk['flight'].cat.codes.to_numpy().astype(np.int64)
+        if not np.array_equal(np.unique(df_chunk['flight_id'].to_numpy()), df_flights['flight_id'].to_numpy()):
+            raise ValueError(f"Flight ids of the points do not match the flight index (flights {n_flights} to {n_flights + len(df_flights)})")
+        table = pa.Table.from_pandas(df_chunk[list_point_columns], preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(path_temporary / 'points.parquet', table.schema)
+        writer.write_table(table, row_group_size=row_group_size)
+        list_df_flights.append(df_flights)
+        n_flights += len(df_chunk['flight'].cat.categories)
+        n_rows += len(df_chunk)
+    if writer is None:
+        shutil.rmtree(path_temporary)
+        raise ValueError(f"No track exports matching '{pattern}' in {directory_tracks}")
+    writer.close()
+
+    # row group boundaries as written, to map each flight's rows to the row groups holding them
+    metadata = pq.ParquetFile(path_temporary / 'points.parquet').metadata
+    group_ends = np.cumsum([metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)])
+    df_flights = pd.concat(list_df_flights, ignore_index=True)
+    df_flights['row_group_first'] = np.searchsorted(group_ends, df_flights['row_start'].to_numpy(), side='right')
+    df_flights['row_group_last'] = np.searchsorted(group_ends, df_flights['row_end'].to_numpy() - 1, side='right')
+    df_flights.to_parquet(path_temporary / 'flights.parquet', index=False)
+
+    shutil.rmtree(path_store, ignore_errors=True)
+    os.replace(path_temporary, path_store)
+    return df_flights
+
+
+def load_flight_index(
+    path_store: str | Path,
+) -> pd.DataFrame:
+    return pd.read_parquet(Path(path_store) / 'flights.parquet')
+
+
+def query_flights(
+    path_store: str | Path,
+    bbox: tuple[float, float, float, float] | None = None,
+    time_range: tuple | None = None,
+    callsigns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Flights of the index whose bounding box intersects `bbox` = (lon_min, lat_min, lon_max, lat_max)
+    and whose time range overlaps `time_range` = (start, end) (anything pd.Timestamp accepts, UTC; end exclusive).
+    These are candidates: a flight whose box intersects `bbox` need not have points inside it (see `query_tracks`).
+    Answered from the index alone, without reading any points.
+    """
+    df_flights = load_flight_index(path_store)
+    selected = np.ones(len(df_flights), dtype=bool)
+    if bbox is not None:
+        lon_min, lat_min, lon_max, lat_max = bbox
+        selected &= (
+            (df_flights['lon_max'] >= lon_min) & (df_flights['lon_min'] <= lon_max)
+            & (df_flights['lat_max'] >= lat_min) & (df_flights['lat_min'] <= lat_max)
+        ).to_numpy()
+    if time_range is not None:
+        start, end = to_utc(time_range)
+        selected &= ((df_flights['time_end'] >= start) & (df_flights['time_start'] < end)).to_numpy()
+    if callsigns is not None:
+        selected &= df_flights['callsign'].isin(callsigns).to_numpy()
+    return df_flights[selected].reset_index(drop=True)
+
+
+def read_flights(
+    path_store: str | Path,
+    df_flights: pd.DataFrame,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Points of the flights in `df_flights` (rows of the flight index), reading only the row groups that contain them.
+    Returns the points with a 'flight' column (name of the track export) and 'time' (datetime64, UTC).
+    """
+    columns = list_point_columns if columns is None else ['flight_id'] + [c for c in columns if c != 'flight_id']
+    if len(df_flights) == 0:
+        return pd.DataFrame(columns = ['flight'] + columns + ['time'])
+    row_groups = np.unique(np.concatenate([
+        np.arange(first, last + 1)
+        for first, last in zip(df_flights['row_group_first'], df_flights['row_group_last'])
+    ]))
+    read_columns = columns if 'timestamp' in columns else columns + ['timestamp']
+    table = pq.ParquetFile(Path(path_store) / 'points.parquet').read_row_groups(row_groups.tolist(), columns=read_columns)
+    df_points = table.to_pandas()
+    df_points = df_points[df_points['flight_id'].isin(df_flights['flight_id'])].reset_index(drop=True)
+    df_points.insert(0, 'flight', df_points['flight_id'].map(df_flights.set_index('flight_id')['flight']).astype('category'))
+    df_points['time'] = pd.to_datetime(df_points['timestamp'].to_numpy(), unit='s', utc=True)
+    if 'timestamp' not in columns:
+        df_points = df_points.drop(columns='timestamp')
+    return df_points
+
+
+def query_tracks(
+    path_store: str | Path,
+    bbox: tuple[float, float, float, float] | None = None,
+    time_range: tuple | None = None,
+    callsigns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Complete tracks of all flights with at least one point inside `bbox` during `time_range`
+    (e.g. all flights crossing a region in July). Candidates are selected from the index (`query_flights`),
+    only their row groups are read (`read_flights`), and the point-in-box test is done on those points.
+    """
+    df_flights = query_flights(path_store, bbox, time_range, callsigns)
+    df_points = read_flights(path_store, df_flights)
+    inside = np.ones(len(df_points), dtype=bool)
+    if bbox is not None:
+        lon_min, lat_min, lon_max, lat_max = bbox
+        inside &= df_points['lon'].between(lon_min, lon_max).to_numpy() & df_points['lat'].between(lat_min, lat_max).to_numpy()
+    if time_range is not None:
+        start, end = to_utc(time_range)
+        inside &= ((df_points['time'] >= start) & (df_points['time'] < end)).to_numpy()
+    flight_ids = np.unique(df_points['flight_id'].to_numpy()[inside])
+    df_points = df_points[df_points['flight_id'].isin(flight_ids)].reset_index(drop=True)
+    df_points['flight'] = df_points['flight'].cat.remove_unused_categories()
+    return df_points
@@ -0,0 +1,154 @@
+#%%
+# reads several sheets of one workbook in a single pass
+# the workbook is opened (unzipped) once in read-only mode, and only the requested columns of the
+# requested sheets are kept while streaming their rows, instead of one pd.read_excel call per sheet
+#
+# usage from a figure script (scripts are run from their own directory):
+#   import sys; sys.path.append('../utilities')
+#   from workbook_reader import read_workbook_sheets
+#   dict_sheets = read_workbook_sheets(
+#       io = 'data/data.xlsx',
+#       sheets = {
+#           'CO2': {'usecols': ['Authors (Label)', 'ERF Average [mW/m2]'], 'dtype': {'Authors (Label)': str, 'ERF Average [mW/m2]': float}},
+#           'NOx': {'usecols': ['Authors (Label)', 'ERF Average [mW/m2]', 'Effect']},
+#       }
+#   )
+#   df_co2 = dict_sheets['CO2']
+
+# IMPORTS #######################################
+
+# i/o
+from pathlib import Path
+import openpyxl
+# data science
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# FUNCTIONS #####################################
+
+def name_columns(
+    header: tuple,
+) -> list[str]:
+    """
+    Column names from a header row, as pd.read_excel names them:
+    empty cells become 'Unnamed: i', repeated names get the suffixes '.1', '.2', ...
+    """
+    list_names = []
+    dict_seen = {}
+    for i, value in enumerate(header):
+        name = f'Unnamed: {i}' if value is None else convert_cell(value)
+        if name in dict_seen:
+            dict_seen[name] += 1
+            name = f'{name}.{dict_seen[name]}'
+        else:
+            dict_seen[name] = 0
+        list_names.append(name)
+    return list_names
+
+
+def convert_cell(
+    value,
+):
+    """
+    Cell value as pd.read_excel passes it on: empty cells are '', integral floats are int.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def last_value_index(
+    row: tuple,
+) -> int:
+    """
+    Index of the last non-empty cell of a row, -1 for an empty row.
+    """
+    for i in range(len(row) - 1, -1, -1):
+        if row[i] is not None:
+            return i
+    return -1
+
+
+def read_sheet_rows(
+    worksheet,
+    usecols: list[str] | None,
+    dtype: dict | type | None,
+    header: int,
+    decimal: str,
+) -> pd.DataFrame:
+    """
+    Streams the rows of one read-only worksheet, keeping only the columns in `usecols`
+    (list of names, callable or None for all columns).
+    The kept cells are parsed by the same TextParser as in pd.read_excel (missing values, type inference, dtype, decimal).
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    for _ in range(header):
+        next(rows, None)
+    header_row = next(rows, ())
+    list_columns = name_columns(header_row)
+    if callable(usecols):
+        list_indices = [i for i, column in enumerate(list_columns) if usecols(column)]
+    elif usecols is None:
+        list_indices = list(range(len(list_columns)))
+    else:
+        missing = set(usecols) - set(list_columns)
+        if missing:
+            raise ValueError(f"Columns {sorted(missing)} not found in sheet '{worksheet.title}'")
+        list_indices = [i for i, column in enumerate(list_columns) if column in usecols]
+
+    list_rows = [[list_columns[i] for i in list_indices]]
+    # pd.read_excel trims trailing empty rows, and trailing columns that are empty in every row
+    n_rows = 1
+    n_columns = last_value_index(header_row) + 1
+    for row in rows:
+        list_rows.append([convert_cell(row[i]) if i < len(row) else '' for i in list_indices])
+        n_values = last_value_index(row) + 1
+        if n_values > 0:
+            n_rows = len(list_rows)
+            n_columns = max(n_columns, n_values)
+    n_kept = sum(i < n_columns for i in list_indices)
+    if n_kept == 0:
+        return pd.DataFrame(index = pd.RangeIndex(n_rows - 1))
+
+    return TextParser(
+        [row[:n_kept] for row in list_rows[:n_rows]],
+        header = 0,
+        dtype = dtype,
+        decimal = decimal,
+    ).read()
+
+
+def read_workbook_sheets(
+    io: str | Path,
+    sheets: dict[str, dict] | list[str],
+) -> dict[str, pd.DataFrame]:
+    """
+    Reads several sheets from one workbook, opened only once (openpyxl, read-only, cached cell values).
+
+    sheets: {sheet name: {'usecols': ..., 'dtype': ..., 'header': 0, 'decimal': '.'}},
+    with the same meaning as the pd.read_excel arguments of the same name
+    (usecols as list of column names or callable), or a list of sheet names to read completely.
+
+    Returns {sheet name: DataFrame}, typed as requested.
+    """
+    if isinstance(sheets, list):
+        sheets = {sheet: {} for sheet in sheets}
+    workbook = openpyxl.load_workbook(io, read_only=True, data_only=True)
+    try:
+        missing = set(sheets) - set(workbook.sheetnames)
+        if missing:
+            raise ValueError(f"Sheets {sorted(missing)} not found in {io}")
+        return {
+            sheet: read_sheet_rows(
+                worksheet = workbook[sheet],
+                usecols = options.get('usecols'),
+                dtype = options.get('dtype'),
+                header = options.get('header', 0),
+                decimal = options.get('decimal', '.'),
+            )
+            for sheet, options in sheets.items()
+        }
+    finally:
+        workbook.close()
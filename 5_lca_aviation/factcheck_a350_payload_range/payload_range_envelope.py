@@ -0,0 +1,121 @@
+#%%
+# payload-range envelopes (corner points A-D) for a catalogue of aircraft
+# with vectorized max. payload and feasibility queries for large sets of missions
+
+# IMPORTS #######################################
+
+# data science
+import numpy as np
+import pandas as pd
+
+# DATA ##########################################
+
+# (range [NM], payload [t]) of the corner points A, B, C, D
+# A: max. structural payload at min. range
+# B: max. structural payload at max. fuel (MTOW-limited)
+# C: max. fuel capacity
+# D: ferry range (zero payload)
+dict_corner_points: dict[str, list[tuple[float, float]]] = {
+    # https://www.airbus.com/sites/g/files/jlcbta136/files/2021-11/Airbus-Commercial-Aircraft-AC-A350-900-1000.pdf
+    'A350-900': [(500, 54), (5830, 54), (8575, 25), (9620, 0)],
+}
+
+# FUNCTIONS #####################################
+
+def build_envelopes(
+    corner_points: dict[str, list[tuple[float, float]]] = dict_corner_points,
+) -> dict[str, np.ndarray]:
+    """
+    Converts the corner points of all aircraft into arrays of shape (aircraft, 4),
+    so that queries can index the envelope of any aircraft without a Python loop.
+    """
+    for aircraft, points in corner_points.items():
+        if len(points) != 4:
+            raise ValueError(f"{aircraft}: expected 4 corner points (A, B, C, D), got {len(points)}")
+        if np.any(np.diff([point[0] for point in points]) < 0):
+            raise ValueError(f"{aircraft}: corner point ranges must be increasing from A to D")
+    return {
+        'aircraft': np.array(list(corner_points.keys())),
+        'range': np.array([[point[0] for point in points] for points in corner_points.values()], dtype=float),
+        'payload': np.array([[point[1] for point in points] for points in corner_points.values()], dtype=float),
+    }
+
+
+def get_aircraft_index(
+    envelopes: dict[str, np.ndarray],
+    aircraft: np.ndarray,
+) -> np.ndarray:
+    """
+    Maps aircraft names to row indices of the envelope arrays.
+    """
+    aircraft_index = pd.Index(envelopes['aircraft']).get_indexer(np.ravel(aircraft))
+    if (aircraft_index == -1).any():
+        unknown = np.unique(np.ravel(aircraft)[aircraft_index == -1])
+        raise ValueError(f"Aircraft missing from envelope catalogue: {list(unknown)}")
+    return aircraft_index.reshape(np.shape(aircraft))
+
+
+def calculate_max_payload(
+    envelopes: dict[str, np.ndarray],
+    aircraft_index: np.ndarray,
+    distance: np.ndarray,
+) -> np.ndarray:
+    """
+    Max. payload [t] at a given range [NM], by linear interpolation between the corner points.
+    `aircraft_index` and `distance` are broadcast against each other, so that e.g.
+    aircraft_index[:, None] and distance[None, :] screen all missions against all aircraft.
+    Below point A the max. structural payload applies; beyond point D the range is infeasible (NaN).
+    Missing (NaN) or negative ranges are not missions and also return NaN.
+    """
+    aircraft_index, distance = np.broadcast_arrays(
+        np.asarray(aircraft_index),
+        np.asarray(distance, dtype=float),
+    )
+    range_points = envelopes['range'][aircraft_index] # (..., 4)
+    payload_points = envelopes['payload'][aircraft_index]
+    distance = distance[..., None]
+
+    # segment 0: A-B, 1: B-C, 2: C-D
+    segment = np.clip(np.sum(distance >= range_points[..., 1:3], axis=-1), 0, 2)[..., None]
+    range_start = np.take_along_axis(range_points, segment, axis=-1)
+    range_end = np.take_along_axis(range_points, segment + 1, axis=-1)
+    payload_start = np.take_along_axis(payload_points, segment, axis=-1)
+    payload_end = np.take_along_axis(payload_points, segment + 1, axis=-1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = np.clip((distance - range_start) / (range_end - range_start), 0, 1)
+    fraction = np.nan_to_num(fraction) # segments of zero length
+    max_payload = (payload_start + fraction * (payload_end - payload_start))[..., 0]
+    with np.errstate(invalid='ignore'):
+        infeasible = (distance[..., 0] > range_points[..., 3]) | ~(distance[..., 0] >= 0)
+    return np.where(infeasible, np.nan, max_payload)
+
+
+def check_feasibility(
+    envelopes: dict[str, np.ndarray],
+    aircraft_index: np.ndarray,
+    payload: np.ndarray,
+    distance: np.ndarray,
+) -> np.ndarray:
+    """
+    True where the (payload [t], range [NM]) mission lies inside the envelope of the aircraft.
+    Missions with a missing (NaN) or negative payload or range are infeasible.
+    """
+    max_payload = calculate_max_payload(envelopes, aircraft_index, distance)
+    with np.errstate(invalid='ignore'):
+        return (np.asarray(payload) >= 0) & (np.asarray(payload) <= max_payload)
+
+
+def export_envelopes(
+    envelopes: dict[str, np.ndarray],
+    path: str,
+) -> None:
+    """
+    Writes all envelopes to one csv file, one row per aircraft.
+    """
+    df_envelopes = pd.DataFrame(
+        data = np.hstack([envelopes['range'], envelopes['payload']]),
+        index = pd.Index(envelopes['aircraft'], name = 'aircraft'),
+        columns = [f'{point} range [NM]' for point in 'ABCD'] + [f'{point} payload [t]' for point in 'ABCD'],
+    )
+    df_envelopes.to_csv(path)